@@ -0,0 +1,200 @@
+from typing import List, Dict, Optional
+from rule_engine import (RuleTable, Puzzle, State, MOVES, OFFSETS, NUM_TILES, NUM_PROFILES, NO_TILE, TILE_CODES,
+                         TILE_EMOJIS, COLOR_NAMES, COLOR_CODES, NUM_INVENTORIES, inventory_bits)
+from solvers import SolverStats, rebuild_path, finish, SOLVED, DEPTH_LIMIT, NODE_LIMIT, EXHAUSTED
+
+try:
+    import numpy as np
+except ImportError:  # numpy est optionnel
+    np = None
+
+
+# Évaluation vectorisée des règles analysées sur les axes (tuile, direction, couleur, inventaire),
+# équivalente à rule_engine.test_condition / rule_holds / apply_action.
+def _membership(values: List[str], names: List) -> "np.ndarray":
+    return np.array([name in values for name in names], dtype=bool)
+
+def _test_condition(rule: Dict, tile_names: List, colors, inventories):
+    # colors / inventories : codes de forme (1 ou tuiles, 1, couleurs, inventaires) diffusables
+    condition = rule["if"]
+    shape = np.broadcast_shapes((NUM_TILES, len(MOVES), 1, 1), np.shape(colors), np.shape(inventories))
+    test_if = np.ones(shape, dtype=bool)
+    if condition.get("type") == "tile_condition":
+        test_if = test_if & _membership(condition["colors"], tile_names)[:, None, None, None]
+    elif condition.get("type") == "direction_condition":
+        test_if = test_if & _membership(condition["directions"], MOVES)[None, :, None, None]
+    elif condition.get("type") == "player_condition":
+        if "colors" in condition:
+            test_if = test_if & _membership(condition["colors"], COLOR_NAMES)[colors]
+        if "directions" in condition:
+            test_if = test_if & _membership(condition["directions"], MOVES)[None, :, None, None]
+        if "items" in condition:
+            test_if = test_if & (inventories & inventory_bits(condition["items"]) != 0)
+
+    if rule["negation"]:
+        test_if = ~test_if
+    return test_if
+
+def _rule_holds(rule: Dict, tile_names: List, colors, inventories):
+    test_if = _test_condition(rule, tile_names, colors, inventories)
+    if rule["then"] == {}:
+        return test_if
+    if rule["then"]["type"] == "direction_condition":
+        return test_if | ~_membership(rule["then"]["directions"], MOVES)[None, :, None, None]
+    return np.full(test_if.shape, rule["then"]["type"] == "player_condition")
+
+def build_tables(table: RuleTable):
+    # Tables complètes (allowed, actions, victory) calculées en une passe, conservées sur la table
+    arrays = getattr(table, "_arrays", None)
+    if arrays is not None:
+        return arrays
+
+    tile_names = COLOR_NAMES + [None]
+    tile_emojis = TILE_EMOJIS + [None]
+    colors = np.arange(len(COLOR_NAMES))[None, None, :, None]
+    inventories = np.arange(NUM_INVENTORIES)[None, None, None, :]
+    full = (NUM_TILES, len(MOVES), len(COLOR_NAMES), NUM_INVENTORIES)
+
+    holds = np.ones(full, dtype=bool)
+    for rule in table.rules:
+        holds &= _rule_holds(rule, tile_names, colors, inventories)
+    holds[NO_TILE] = False
+    weights = (1 << np.arange(len(MOVES)))[None, :, None, None]
+    allowed = (holds * weights).sum(axis=1).astype(np.uint8).reshape(NUM_TILES, NUM_PROFILES)
+
+    new_colors = np.broadcast_to(colors, full).copy()
+    new_inventories = np.broadcast_to(inventories, full).copy()
+    for rule in table.action_rules:
+        test_if = np.broadcast_to(_test_condition(rule, tile_emojis, new_colors, new_inventories), full)
+        new_inventories = np.where(test_if, new_inventories | inventory_bits(rule["then"].get("items", [])), new_inventories)
+        if "colors" in rule["then"]:
+            new_colors = np.where(test_if, COLOR_CODES[rule["then"]["colors"][0]], new_colors)
+    actions = (new_colors * NUM_INVENTORIES + new_inventories).reshape(NUM_TILES, len(MOVES), NUM_PROFILES)
+
+    victory = np.ones(full, dtype=bool)
+    for rule in table.victory_rules:
+        victory &= _rule_holds(rule, tile_emojis, colors, inventories)
+    victory = victory.reshape(NUM_TILES, len(MOVES), NUM_PROFILES)
+
+    table._arrays = (allowed, actions, victory)
+    return table._arrays
+
+
+# Représentation tableau d'un niveau : codes couleur uint8 et masques précalculés
+# pour toutes les cases et tous les profils (couleur + inventaire) à la fois.
+class ArrayLevel:
+    def __init__(self, grid: List[List[str]], table: RuleTable):
+        if np is None:
+            raise ImportError("numpy est nécessaire pour ArrayLevel")
+        self.table = table
+        self.tiles = np.array([[TILE_CODES.get(tile, NO_TILE) for tile in row] for row in grid], dtype=np.uint8)
+        self.height, self.width = self.tiles.shape
+
+        # Directions qui restent dans la grille, pour chaque case
+        ys, xs = np.indices(self.tiles.shape)
+        self.bounds = np.zeros(self.tiles.shape, dtype=np.uint8)
+        for move, (dx, dy) in enumerate(OFFSETS):
+            inside = (xs + dx >= 0) & (xs + dx < self.width) & (ys + dy >= 0) & (ys + dy < self.height)
+            self.bounds |= inside.astype(np.uint8) << move
+
+        # Case voisine de chaque case (indice y * largeur + x), -1 hors grille
+        cells = ys * self.width + xs
+        self.neighbours = np.full((self.height * self.width, len(MOVES)), -1, dtype=np.int64)
+        for move, (dx, dy) in enumerate(OFFSETS):
+            inside = (self.bounds >> move) & 1 == 1
+            self.neighbours[cells[inside], move] = (cells + dy * self.width + dx)[inside]
+
+        self.allowed_table, self.actions_table, self.victory_table = build_tables(table)
+        self.cell_tiles = self.tiles.reshape(-1)
+        self.cell_bounds = self.bounds.reshape(-1)
+
+    @classmethod
+    def from_puzzle(cls, puzzle: Puzzle) -> "ArrayLevel":
+        return cls(puzzle.grid, puzzle.table)
+
+    def move_masks(self):
+        # Masque des directions permises pour chaque case et chaque profil : (hauteur, largeur, profils)
+        return self.allowed_table[self.tiles] & self.bounds[:, :, None]
+
+    def transitions(self):
+        # Pour chaque état (case * NUM_PROFILES + profil) et chaque direction :
+        # état suivant (-1 si interdit) et victoire à l'arrivée.
+        cell_tiles = self.tiles.reshape(-1)
+        masks = self.move_masks().reshape(-1, NUM_PROFILES)
+        successors = np.full((cell_tiles.size * NUM_PROFILES, len(MOVES)), -1, dtype=np.int64)
+        victories = np.zeros((cell_tiles.size * NUM_PROFILES, len(MOVES)), dtype=bool)
+        for move in range(len(MOVES)):
+            allowed = ((masks >> move) & 1 == 1).reshape(-1)
+            next_cells = np.repeat(self.neighbours[:, move], NUM_PROFILES)
+            next_profiles = self.actions_table[cell_tiles, move].reshape(-1)
+            next_states = next_cells * NUM_PROFILES + next_profiles
+            successors[allowed, move] = next_states[allowed]
+            arrival_tiles = cell_tiles[np.where(next_cells >= 0, next_cells, 0)]
+            victories[:, move] = allowed & self.victory_table[arrival_tiles, move, next_profiles]
+        return successors, victories
+
+    def successors(self, states):
+        # Comme transitions(), limité aux états donnés (tableau d'ids) : (n, 4) successeurs
+        # (-1 si interdit) et (n, 4) victoires. Le coût suit le nombre d'états explorés.
+        cells, profiles = np.divmod(states, NUM_PROFILES)
+        tiles = self.cell_tiles[cells]
+        moves = np.arange(len(MOVES))
+        allowed = (self.allowed_table[tiles, profiles] & self.cell_bounds[cells])[:, None] >> moves & 1 == 1
+        next_cells = self.neighbours[cells]
+        next_profiles = self.actions_table[tiles[:, None], moves, profiles[:, None]]
+        next_states = np.where(allowed, next_cells * NUM_PROFILES + next_profiles, -1)
+        arrival_tiles = self.cell_tiles[np.where(next_cells >= 0, next_cells, 0)]
+        victories = allowed & self.victory_table[arrival_tiles, moves, next_profiles]
+        return next_states, victories
+
+
+def solve_array_bfs(puzzle: Puzzle, start: State, max_length: int = 15, max_nodes: Optional[int] = None, stats: Optional[SolverStats] = None) -> Optional[List[str]]:
+    # BFS par couches vectorisée : les transitions de chaque couche sont calculées d'un
+    # bloc (ArrayLevel.successors), seulement pour les états atteints ; même ordre
+    # d'exploration (et donc même solution) que solvers.solve_bfs.
+    # Les tables numpy des règles sont construites au premier appel pour chaque RuleTable.
+    # Sur le banc d'essai, solve_bfs reste plus rapide jusqu'aux grilles 20x20 ; les deux
+    # se valent en 40x40.
+    # stats ne reçoit que des compteurs par couche : ni callbacks par état, ni
+    # chronométrage des règles (les tables sont calculées d'un bloc).
+    if stats is not None:
+        stats.begin("array", puzzle)
+    level = ArrayLevel.from_puzzle(puzzle)
+    start_id = puzzle.state_id(start)
+    parents = {start_id: -1}
+    visited = np.zeros(level.cell_tiles.size * NUM_PROFILES, dtype=bool)
+    visited[start_id] = True
+    frontier = np.array([start_id], dtype=np.int64)
+    expanded = 0
+
+    for depth in range(max_length):
+        budget = len(frontier) if max_nodes is None else max(0, min(len(frontier), max_nodes - expanded))
+        successors, won = level.successors(frontier[:budget])
+        if won.any():
+            index = int(np.argmax(won.reshape(-1)))
+            state_id, move = int(frontier[index // len(MOVES)]), index % len(MOVES)
+            return finish(stats, SOLVED, len(parents), rebuild_path(parents, state_id) + [MOVES[move]])
+        if budget < len(frontier):
+            return finish(stats, NODE_LIMIT, len(parents))
+        expanded += len(frontier)
+
+        # Successeurs dans l'ordre (parent, direction), premières occurrences seulement
+        candidates = successors.reshape(-1)
+        keep = candidates >= 0
+        if stats is not None:
+            stats.layer(depth, len(frontier), int(keep.sum()))
+            stats.queue_size(len(frontier))
+        keep[keep] = ~visited[candidates[keep]]
+        fresh, first = np.unique(candidates[keep], return_index=True)
+        if fresh.size == 0:
+            return finish(stats, EXHAUSTED, len(parents))
+        order = np.argsort(first)
+        positions = np.flatnonzero(keep)[first[order]]
+
+        # parents : id d'état -> id du parent * 4 + direction
+        links = frontier[positions // len(MOVES)] * len(MOVES) + positions % len(MOVES)
+        frontier = fresh[order]
+        visited[frontier] = True
+        parents.update(zip(frontier.tolist(), links.tolist()))
+
+    return finish(stats, DEPTH_LIMIT, len(parents))
@@ -0,0 +1,194 @@
+# Banc d'essai reproductible du compilateur de règles, des solveurs et du générateur.
+#
+#   python benchmarks/bench.py --output avant.json
+#   python benchmarks/bench.py --output apres.json --compare avant.json
+#
+# Les corpus (règles et grilles) sont tirés d'une graine fixe ; les résultats sont
+# écrits en JSON pour pouvoir comparer deux exécutions.
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from constants import COLORS  # noqa: E402
+from game import Level  # noqa: E402
+from level_generation import generate_random_rules, generate_random_grid, generate_level  # noqa: E402
+from rule_engine import Puzzle, RuleTable, State, _TABLE_CACHE  # noqa: E402
+from solvers import SOLVERS, SolverStats  # noqa: E402
+from solve_cache import set_default_cache  # noqa: E402
+import utils  # noqa: E402
+
+TEMPLATE = [["⬜", "", "⬜", "", "⬜"],
+            ["", "⬜", "", "⬜", ""],
+            ["⬜", "", "⬜", "", "⬜"],
+            ["", "⬜", "", "⬜", ""],
+            ["⬜", "", "⬜", "", "⬜"]]
+
+
+def build_corpus(seed: int, count: int, sizes):
+    rng = random.Random(seed)
+    corpus = []
+    for size in sizes:
+        for _ in range(count):
+            emoji_rules = generate_random_rules(rng.randint(2, 6), rng)
+            grid = generate_random_grid(list(COLORS.keys()), [[""] * size for _ in range(size)], rng)
+            corpus.append({"size": size, "emoji_rules": emoji_rules, "grid": grid})
+    return corpus
+
+
+def measure(function, setup=None):
+    # (résultat, secondes, pic mémoire en octets), sorties console ignorées.
+    # tracemalloc ralentit chaque allocation : la durée est mesurée sans lui, le pic
+    # mémoire dans une seconde exécution. setup est appelé avant chacune des deux.
+    if setup is not None:
+        setup()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = function()
+    elapsed = time.perf_counter() - start
+
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def clear_caches():
+    utils.parse_rule.cache_clear()
+    utils.compile_emoji_rule.cache_clear()
+    _TABLE_CACHE.clear()
+
+
+def bench_compile(corpus):
+    results = []
+    def run():
+        for entry in corpus:
+            utils.compile_rules(entry["emoji_rules"], table=True)
+
+    for label, cold in (("compile_rules_cold", True), ("compile_rules_warm", False)):
+        _, elapsed, peak = measure(run, clear_caches if cold else None)
+        results.append({"name": label, "items": len(corpus), "seconds": elapsed,
+                        "items_per_second": len(corpus) / elapsed, "peak_bytes": peak})
+    return results
+
+
+def bench_solvers(corpus, engines, max_length):
+    with contextlib.redirect_stdout(io.StringIO()):
+        compiled = [utils.compile_rules(entry["emoji_rules"]) for entry in corpus]
+
+    results = []
+    for size in sorted({entry["size"] for entry in corpus}):
+        cases = [(entry, rules) for entry, rules in zip(corpus, compiled) if entry["size"] == size]
+        for engine in engines:
+            def run(stats=None):
+                solved = 0
+                for entry, (rules, action_rules, victory_rules) in cases:
+                    table = RuleTable.from_compiled(rules, action_rules, victory_rules)
+                    puzzle = Puzzle(entry["grid"], table)
+                    if SOLVERS[engine](puzzle, State.make((0, 0)), max_length, stats=stats) is not None:
+                        solved += 1
+                return solved
+
+            # Chaque moteur reconstruit ses tables
+            solved, elapsed, peak = measure(run, _TABLE_CACHE.clear)
+            # États développés, comptés par le moteur lui-même dans une exécution à part
+            stats = SolverStats()
+            run(stats)
+            results.append({"name": f"solve_{engine}", "size": size, "items": len(cases), "solved": solved,
+                            "seconds": elapsed, "nodes": stats.nodes_expanded,
+                            "nodes_per_second": stats.nodes_expanded / elapsed, "peak_bytes": peak})
+
+        def run_dfs():
+            for entry, (rules, action_rules, victory_rules) in cases:
+                level = Level(entry["grid"], (0, 0))
+                utils.solve_level_dfs(level, rules, action_rules, victory_rules, level.start, [], set())
+
+        _, elapsed, peak = measure(run_dfs)
+        results.append({"name": "solve_level_dfs", "size": size, "items": len(cases),
+                        "seconds": elapsed, "peak_bytes": peak})
+    return results
+
+
+def bench_generation(seed: int, levels: int, num_rules: int, min_length: int):
+    results = []
+    for label, local_search in (("generate_level", False), ("generate_level_local", True)):
+        def run():
+            for k in range(levels):
+                generate_level(num_rules, min_length, TEMPLATE, rng=random.Random(seed + k), local_search=local_search)
+
+        _, elapsed, peak = measure(run)
+        results.append({"name": label, "items": levels, "seconds": elapsed,
+                        "levels_per_minute": 60 * levels / elapsed, "peak_bytes": peak})
+    return results
+
+
+def compare(current, previous):
+    # Rapport avant / après : ratio des durées (> 1 = plus rapide qu'avant)
+    def key(result):
+        return (result["name"], result.get("size"))
+
+    before = {key(result): result for result in previous["results"]}
+    for result in current["results"]:
+        old = before.get(key(result))
+        if old is None:
+            continue
+        ratio = old["seconds"] / result["seconds"] if result["seconds"] else float("inf")
+        size = f" {result['size']}x{result['size']}" if result.get("size") else ""
+        print(f"{result['name']}{size}: {old['seconds']:.3f}s -> {result['seconds']:.3f}s (x{ratio:.2f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc d'essai du solveur, du compilateur et du générateur")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--count", type=int, default=200, help="jeux de règles par taille de grille")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 8, 12, 20])
+    parser.add_argument("--engines", nargs="+", default=sorted(SOLVERS))
+    parser.add_argument("--max-length", type=int, default=15)
+    parser.add_argument("--levels", type=int, default=5, help="niveaux générés pour le débit du générateur")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="fichier JSON d'une exécution précédente")
+    args = parser.parse_args()
+    set_default_cache(None)  # mesurer les solveurs, pas le cache disque
+
+    corpus = build_corpus(args.seed, args.count, args.sizes)
+    results = bench_compile(corpus)
+    results += bench_solvers(corpus, args.engines, args.max_length)
+    results += bench_generation(args.seed, args.levels, 5, 5)
+
+    report = {
+        "meta": {
+            "seed": args.seed,
+            "count": args.count,
+            "sizes": args.sizes,
+            "max_length": args.max_length,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    for result in results:
+        size = f" {result['size']}x{result['size']}" if result.get("size") else ""
+        print(f"{result['name']}{size}: {result['seconds']:.3f}s, pic {result['peak_bytes'] / 1024:.0f} Ko")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+from typing import List, Dict, Tuple
+import hashlib
+import json
+import math
+from rule_engine import RuleTable, TILE_CODES, TILE_EMOJIS, NO_TILE, NUM_PROFILES, MOVES, canonical_rules_key
+
+# Formes canoniques des niveaux et ensembles de niveaux déjà vus, pour que le générateur
+# et les corpus n'évaluent ni ne stockent deux fois le même niveau.
+
+
+def tile_classes(table: RuleTable) -> List[int]:
+    # Pour chaque code de tuile, la plus petite tuile qui se comporte exactement pareil
+    # avec ces règles (mêmes déplacements permis, mêmes actions, même victoire pour tous
+    # les profils). Renommer une couleur en une autre de sa classe ne change pas le niveau.
+    classes = getattr(table, "_tile_classes", None)
+    if classes is not None:
+        return classes
+    signatures = {}
+    classes = []
+    for tile in range(len(TILE_EMOJIS)):
+        signature = (
+            tuple(table.allowed_mask(tile, profile) for profile in range(NUM_PROFILES)),
+            tuple(table.apply_actions(tile, move, profile) for move in range(len(MOVES)) for profile in range(NUM_PROFILES)),
+            tuple(table.is_victory(tile, move, profile) for move in range(len(MOVES)) for profile in range(NUM_PROFILES)),
+        )
+        classes.append(signatures.setdefault(signature, tile))
+    table._tile_classes = classes
+    return classes
+
+def canonical_grid(grid: List[List[str]], table: RuleTable) -> List[List[str]]:
+    classes = tile_classes(table)
+    return [[TILE_EMOJIS[classes[TILE_CODES[tile]]] if TILE_CODES.get(tile, NO_TILE) != NO_TILE else "" for tile in row]
+            for row in grid]
+
+def level_key(grid: List[List[str]], start: Tuple[int, int], table: RuleTable) -> bytes:
+    # Empreinte d'un niveau : deux niveaux de même empreinte se jouent à l'identique
+    content = json.dumps([
+        canonical_rules_key(table.rules, table.action_rules, table.victory_rules),
+        canonical_grid(grid, table),
+        list(start),
+    ], ensure_ascii=False)
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=16).digest()
+
+def level_key_from_data(data: Dict) -> bytes:
+    # data : niveau au format JSON (grid, start, emoji_rules)
+    from utils import compile_rules
+    return level_key(data["grid"], data["start"], compile_rules(data["emoji_rules"], table=True, verbose=False))
+
+
+class SeenSet:
+    # Ensemble exact d'empreintes. add renvoie False si l'empreinte était déjà présente.
+    def __init__(self):
+        self._keys = set()
+
+    def add(self, key: bytes) -> bool:
+        if key in self._keys:
+            return False
+        self._keys.add(key)
+        return True
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class BloomFilter:
+    # Filtre de Bloom : mémoire fixe quel que soit le nombre de niveaux, au prix de
+    # faux positifs (un niveau nouveau pris pour un niveau déjà vu) avec une
+    # probabilité error_rate une fois capacity empreintes ajoutées. Jamais de faux négatif.
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self._count = 0
+
+    def _positions(self, key: bytes):
+        # Double hachage : positions h1 + i * h2
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key: bytes) -> bool:
+        new = False
+        for position in self._positions(key):
+            byte, bit = divmod(position, 8)
+            if not self._bits[byte] & (1 << bit):
+                self._bits[byte] |= 1 << bit
+                new = True
+        if new:
+            self._count += 1
+        return new
+
+    def __contains__(self, key: bytes) -> bool:
+        return all(self._bits[position // 8] & (1 << position % 8) for position in self._positions(key))
+
+    def __len__(self) -> int:
+        # Nombre approximatif d'empreintes (sous-estimé en cas de faux positifs)
+        return self._count
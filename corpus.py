@@ -0,0 +1,178 @@
+from typing import List, Dict, Iterator, Optional
+import argparse
+import itertools
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from level_generation import GenerationReport, generate_level_from_seed, generation_task, is_new_level
+from canonical import BloomFilter, level_key_from_data
+
+# Corpus de niveaux générés, un niveau JSON par ligne (JSONL). Le niveau d'index i est
+# tiré avec la graine seed + i : pour reprendre une génération interrompue il suffit
+# de connaître l'index suivant, enregistré dans un point de reprise à côté du corpus.
+
+GRID = [["⬜", "", "⬜", "", "⬜"],
+        ["", "⬜", "", "⬜", ""],
+        ["⬜", "", "⬜", "", "⬜"],
+        ["", "⬜", "", "⬜", ""],
+        ["⬜", "", "⬜", "", "⬜"]]
+
+
+def iter_levels(num_rules: int, min_length_solution: int, grid: List[List[str]], seed: int = 0, start: int = 0, count: Optional[int] = None, workers: Optional[int] = None, engine: str = "bfs", local_search: bool = False, require_unique: bool = False, min_difficulty: Optional[float] = None, seen=None, report: Optional[GenerationReport] = None) -> Iterator[Dict]:
+    # Niveaux d'index start, start + 1, ... (sans fin si count est None), dans l'ordre,
+    # sans ceux déjà présents dans seen (appliqué ici, dans l'ordre des index).
+    # Avec workers, au plus 2 * workers niveaux sont en cours : la mémoire reste bornée.
+    indices = itertools.count(start) if count is None else range(start, start + count)
+
+    if not workers:
+        for index in indices:
+            level = generate_level_from_seed(seed + index, num_rules, min_length_solution, grid, engine, local_search,
+                                             require_unique, min_difficulty, report=report)
+            if is_new_level(level, seen, report):
+                yield dict(level, index=index)
+        return
+
+    def submit(index):
+        task_report = GenerationReport(report.timing) if report is not None else None
+        return index, pool.submit(generation_task, seed + index, num_rules, min_length_solution, grid, engine, local_search,
+                                  require_unique, min_difficulty, task_report)
+
+    def result(index, future):
+        level, task_report = future.result()
+        if report is not None:
+            report.merge(task_report)
+        return dict(level, index=index) if is_new_level(level, seen, report) else None
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for index in indices:
+            pending.append(submit(index))
+            if len(pending) >= 2 * workers:
+                level = result(*pending.popleft())
+                if level is not None:
+                    yield level
+        while pending:
+            level = result(*pending.popleft())
+            if level is not None:
+                yield level
+
+
+def checkpoint_path(path) -> Path:
+    return Path(str(path) + ".checkpoint")
+
+def read_checkpoint(path) -> Optional[Dict]:
+    try:
+        with open(checkpoint_path(path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def write_checkpoint(path, checkpoint: Dict):
+    # Écriture atomique : un arrêt brutal laisse l'ancien ou le nouveau point de reprise
+    temporary = Path(str(checkpoint_path(path)) + ".tmp")
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, checkpoint_path(path))
+
+
+def generate_corpus(path, count: Optional[int], num_rules: int, min_length_solution: int, grid: List[List[str]], seed: int = 0, workers: Optional[int] = None, engine: str = "bfs", local_search: bool = False, resume: bool = True, dedupe: bool = True, capacity: int = 1_000_000, require_unique: bool = False, min_difficulty: Optional[float] = None, report: Optional[GenerationReport] = None) -> Iterator[Dict]:
+    # Ajoute count niveaux (sans fin si None) au corpus JSONL et les renvoie au fur et à
+    # mesure. Chaque niveau est écrit dès qu'il est accepté, puis le point de reprise
+    # (index suivant, taille du fichier) est mis à jour.
+    # dedupe : un niveau équivalent à un niveau déjà écrit (même forme canonique) est
+    # ignoré ; le filtre de Bloom garde une mémoire fixe pour capacity niveaux.
+    # require_unique, min_difficulty, report : comme pour level_generation.generate_level.
+    params = {"num_rules": num_rules, "min_length_solution": min_length_solution, "grid": grid,
+              "seed": seed, "engine": engine, "local_search": local_search}
+    # Filtres enregistrés seulement s'ils sont utilisés : les anciens points de reprise restent valables
+    if require_unique:
+        params["require_unique"] = True
+    if min_difficulty is not None:
+        params["min_difficulty"] = min_difficulty
+    checkpoint = read_checkpoint(path) if resume else None
+    if checkpoint is not None and checkpoint["params"] != params:
+        raise ValueError("Le point de reprise a été créé avec d'autres paramètres.")
+
+    with open(path, "a+b") as f:
+        size = f.seek(0, os.SEEK_END)
+        if checkpoint is not None:
+            if size < checkpoint["offset"]:
+                raise ValueError("Le corpus est plus court que son point de reprise.")
+            # Une ligne écrite après le dernier point de reprise est incomplète ou en double
+            f.truncate(checkpoint["offset"])
+        else:
+            # Sans point de reprise, les niveaux déjà présents sont gardés et comptés
+            f.seek(0)
+            produced = sum(1 for line in f if line.strip())
+            checkpoint = {"params": params, "next_index": 0, "offset": size, "produced": produced}
+        if count is not None and checkpoint["produced"] >= count:
+            return
+
+        seen = None
+        if dedupe:
+            seen = BloomFilter(capacity)
+            for level in read_corpus(path):
+                seen.add(level_key_from_data(level))
+
+        for level in iter_levels(num_rules, min_length_solution, grid, seed, checkpoint["next_index"], None, workers, engine, local_search,
+                                 require_unique, min_difficulty, report=report):
+            checkpoint["next_index"] = level["index"] + 1
+            if seen is not None and not seen.add(level_key_from_data(level)):
+                # Filtré ici plutôt que par iter_levels pour compter les doublons dans le point de reprise
+                checkpoint["duplicates"] = checkpoint.get("duplicates", 0) + 1
+                if report is not None:
+                    report.duplicates += 1
+                write_checkpoint(path, checkpoint)
+                continue
+            f.write((json.dumps(level, ensure_ascii=False) + "\n").encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+            checkpoint["offset"] = f.tell()
+            checkpoint["produced"] += 1
+            write_checkpoint(path, checkpoint)
+            yield level
+            if count is not None and checkpoint["produced"] >= count:
+                return
+
+def read_corpus(path) -> Iterator[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génération d'un corpus de niveaux (JSONL), avec reprise")
+    parser.add_argument("output", help="fichier JSONL (complété s'il existe déjà)")
+    parser.add_argument("--count", type=int, help="nombre total de niveaux (sans fin par défaut)")
+    parser.add_argument("--rules", type=int, default=5, help="nombre de règles par niveau")
+    parser.add_argument("--min-length", type=int, default=5, help="longueur minimale de la solution")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, help="processus de génération (aucun par défaut)")
+    parser.add_argument("--engine", default="bfs")
+    parser.add_argument("--local-search", action="store_true")
+    parser.add_argument("--restart", action="store_true", help="repartir de zéro : efface le corpus et ignore le point de reprise")
+    parser.add_argument("--keep-duplicates", action="store_true", help="écrire aussi les niveaux équivalents")
+    parser.add_argument("--unique", action="store_true", help="garder seulement les niveaux à solution la plus courte unique")
+    parser.add_argument("--min-difficulty", type=float, help="difficulté minimale (level_analysis)")
+    parser.add_argument("--report", action="store_true", help="afficher le bilan de la génération")
+    args = parser.parse_args()
+
+    if args.restart and Path(args.output).exists():
+        Path(args.output).unlink()
+    report = GenerationReport() if args.report else None
+    for level in generate_corpus(args.output, args.count, args.rules, args.min_length, GRID, args.seed,
+                                 args.workers, args.engine, args.local_search, resume=not args.restart,
+                                 dedupe=not args.keep_duplicates, require_unique=args.unique,
+                                 min_difficulty=args.min_difficulty, report=report):
+        print(f"Niveau {level['index']} : solution en {len(level['solution'])} coups")
+    if report is not None:
+        report.print()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,6 @@
 from typing import List, Tuple, Callable
-from utils import move_player_if_allowed, print_level
-import json
-from utils import compile_rules
-from constants import PATH
+from rule_engine import Puzzle, State, inventory_items
+from renderer import TerminalRenderer
 
 class Level:
     def __init__(self, grid: List[List[str]], start: Tuple[int]):
@@ -35,50 +33,51 @@ class Level:
             return True
         return False  # Invalid move
 
+    def state(self) -> State:
+        return State.make(self.player_pos, self.player_color, self.player_inventory)
+
+    def set_state(self, state: State):
+        self.player_pos = state.pos
+        self.player_color = state.color
+        self.player_inventory = inventory_items(state.inventory)
+
 def interactive_game_loop(level: Level, rules: List[Callable[[str, str], bool]], action_rules: List[Callable[[str, str], bool]], victory_rules: List[Callable[[str, str], bool]]):
-    print("Bienvenue dans le test de niveau !")
-    print("Commandes : UP / DOWN / LEFT / RIGHT / QUIT")
-    print_level(level)
+    # Seules les cases modifiées sont redessinées après chaque coup (voir renderer)
+    renderer = TerminalRenderer(level)
+    renderer.message("Bienvenue dans le test de niveau !\nCommandes : UP / DOWN / LEFT / RIGHT / QUIT")
+    renderer.draw()
+
+    # Les transitions sont pures : l'état du joueur n'est recopié dans le niveau que pour l'affichage
+    puzzle = Puzzle.from_level(level, rules, action_rules, victory_rules)
+    state = level.state()
 
     while True:
         cmd = input("Déplacement ? ").strip().upper()
         if cmd == "QUIT":
-            print("Fin de la partie.")
+            renderer.message("Fin de la partie.")
             break
         elif cmd in ["UP", "DOWN", "LEFT", "RIGHT"]:
-            moved = move_player_if_allowed(level, cmd, rules)
-            if moved:
-                print(f"Action : {cmd} → {'✔️'}")
-                print_level(level)
-                # Appliquer les règles d'action
-                for action_rule in action_rules:
-                    action_rule(level, cmd, level.get_tile(level.player_pos), rules)
-                    if all(rule(level, cmd, level.get_tile(level.player_pos), rules) for rule in victory_rules):
-                        
-                        print("🎉 Bravo, vous avez gagné !")
-                        return 0
+            new_state = puzzle.step(state, cmd)
+            if new_state is not None:
+                state = new_state
+                level.set_state(state)
+                renderer.message(f"Action : {cmd} → {'✔️'}")
+                renderer.update()
+                if puzzle.is_victory(state, cmd):
+                    renderer.message("🎉 Bravo, vous avez gagné !")
+                    return 0
             else:
-                print(f"Action : {cmd} → {'❌'}")
-                print_level(level)
+                renderer.message(f"Action : {cmd} → {'❌'}")
+                renderer.update()
             
         else:
-            print("Commande invalide. Essayez : UP, DOWN, LEFT, RIGHT, QUIT.")
-
-# Fonction pour lire un niveau depuis un fichier .json
-def load_level(filename: str) -> Tuple:
-    with open(PATH / "Levels" / filename, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    grid = data["grid"]
-    start = tuple(data["start"])
-    emoji_rules = data["emoji_rules"]
-
-    print(emoji_rules)
-
-    rules, action_rules, victory_rules = compile_rules(emoji_rules)
-
-    solution = data["solution"]
-    level = Level(grid, start)
-    
-    print(emoji_rules)
+            renderer.message("Commande invalide. Essayez : UP, DOWN, LEFT, RIGHT, QUIT.")
 
+# Fonction pour lire un niveau depuis un fichier .json de Levels/ (ou "paquet.pack#index").
+# Le registre ne relit pas un niveau déjà chargé et réutilise ses règles compilées.
+def load_level(filename: str, verbose: bool = False) -> Tuple:
+    from level_registry import default_registry
+    level, rules, action_rules, victory_rules, solution = default_registry().load(filename)
+    if verbose:
+        print(default_registry().data(filename)["emoji_rules"])
     return level, rules, action_rules, victory_rules, solution
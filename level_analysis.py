@@ -0,0 +1,106 @@
+from typing import List, Dict, NamedTuple, Optional
+from collections import deque
+import math
+from rule_engine import Puzzle, State, MOVES
+
+# Analyse d'un niveau sur son graphe d'états : le graphe atteignable est construit une
+# seule fois, puis des passes de programmation dynamique en tirent le nombre de
+# solutions les plus courtes, les impasses et le facteur de branchement, sans
+# énumérer de chemins.
+#
+# Une transition victorieuse termine la partie : elle compte comme une arête vers
+# la victoire, pas vers l'état d'arrivée (comme dans solvers.solve_bfs).
+
+
+class LevelAnalysis(NamedTuple):
+    shortest_length: Optional[int]  # None : pas de solution en max_length coups
+    solution_count: int             # nombre de solutions de longueur shortest_length
+    unique: bool
+    reachable_states: int
+    dead_ends: int                  # états atteignables d'où l'on ne peut plus gagner
+    branching: float                # nombre moyen de coups permis par état atteignable
+    difficulty: Optional[float]     # voir analyse_level
+
+
+def build_state_graph(puzzle: Puzzle, start: State):
+    # (ids dans l'ordre BFS, distances depuis le départ, arêtes id -> [(direction, id ou None si victoire)])
+    start_id = puzzle.state_id(start)
+    distances = {start_id: 0}
+    edges: Dict[int, List] = {}
+    order = []
+    queue = deque([start_id])
+    while queue:
+        state_id = queue.popleft()
+        order.append(state_id)
+        state = puzzle.state_from_id(state_id)
+        successors = []
+        for move, direction in enumerate(MOVES):
+            new_state = puzzle.step(state, direction)
+            if new_state is None:
+                continue
+            if puzzle.is_victory(new_state, direction):
+                successors.append((move, None))
+                continue
+            new_id = puzzle.state_id(new_state)
+            successors.append((move, new_id))
+            if new_id not in distances:
+                distances[new_id] = distances[state_id] + 1
+                queue.append(new_id)
+        edges[state_id] = successors
+    return order, distances, edges
+
+def analyse_level(puzzle: Puzzle, start: State, max_length: int = 15) -> LevelAnalysis:
+    # difficulty : -log2 de la probabilité qu'un joueur qui choisit chaque coup au hasard
+    # parmi les coups permis joue une solution la plus courte. Elle augmente avec la
+    # longueur de la solution, le branchement le long du chemin et la rareté des solutions.
+    order, distances, edges = build_state_graph(puzzle, start)
+    branching = sum(len(successors) for successors in edges.values()) / len(order)
+
+    # Impasses : états d'où aucune transition victorieuse n'est atteignable (graphe inverse)
+    predecessors: Dict[int, List[int]] = {}
+    winning = deque()
+    for state_id, successors in edges.items():
+        for _, new_id in successors:
+            if new_id is None:
+                winning.append(state_id)
+            else:
+                predecessors.setdefault(new_id, []).append(state_id)
+    can_win = set(winning)
+    while winning:
+        state_id = winning.popleft()
+        for previous in predecessors.get(state_id, ()):
+            if previous not in can_win:
+                can_win.add(previous)
+                winning.append(previous)
+    dead_ends = len(order) - len(can_win)
+
+    last_layers = [distances[state_id] for state_id in can_win if any(new_id is None for _, new_id in edges[state_id])]
+    if not last_layers or min(last_layers) + 1 > max_length:
+        return LevelAnalysis(None, 0, False, len(order), dead_ends, branching, None)
+    shortest = min(last_layers) + 1
+
+    # Nombre de plus courts chemins et probabilité d'un jeu au hasard, couche par couche
+    # (order est trié par distance croissante)
+    counts = {order[0]: 1}
+    probabilities = {order[0]: 1.0}
+    solutions = 0
+    probability = 0.0
+    for state_id in order:
+        depth = distances[state_id]
+        if depth >= shortest:
+            break
+        count = counts.get(state_id, 0)
+        successors = edges[state_id]
+        if not count or not successors:
+            continue
+        share = probabilities[state_id] / len(successors)
+        for _, new_id in successors:
+            if new_id is None:
+                if depth == shortest - 1:
+                    solutions += count
+                    probability += share
+            elif distances[new_id] == depth + 1:
+                counts[new_id] = counts.get(new_id, 0) + count
+                probabilities[new_id] = probabilities.get(new_id, 0.0) + share
+
+    return LevelAnalysis(shortest, solutions, solutions == 1, len(order), dead_ends, branching, -math.log2(probability))
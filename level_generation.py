@@ -1,64 +1,70 @@
-from typing import List, Tuple
+from typing import List, Tuple, Dict, Iterator, Optional
 import random
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 from constants import COLORS, DIRECTIONS, ITEMS
 from game import Level
 from utils import solve_level, compile_rules
+from rule_engine import RuleTable, Puzzle, State
+from solvers import solve_bfs, SolverStats
+from rule_analysis import analyse_rules, IMPOSSIBLE, TRIVIAL
+from level_analysis import analyse_level
+from canonical import level_key, level_key_from_data
 
-def generate_tile_condition_rule() -> str:
+def generate_tile_condition_rule(rng=random) -> str:
     tiles = list(COLORS.keys())
-    tile_emojis = random.sample(tiles, k=random.randint(1, 3))
+    tile_emojis = rng.sample(tiles, k=rng.randint(1, 3))
     return ''.join(tile_emojis)
 
-def generate_direction_condition_rule() -> str:
+def generate_direction_condition_rule(rng=random) -> str:
     directions = list(DIRECTIONS.keys())
-    dir_emojis = random.sample(directions, k=random.randint(1, 2))
+    dir_emojis = rng.sample(directions, k=rng.randint(1, 2))
     return ''.join(dir_emojis)
 
-def generate_player_condition_rule() -> str:
+def generate_player_condition_rule(rng=random) -> str:
     player_conditions = []
-    if random.random() < 0.5:  # 50% chance to include color
+    if rng.random() < 0.5:  # 50% chance to include color
         colors = list(COLORS.keys())
-        color_emojis = random.sample(colors, k=random.randint(1, 2))
+        color_emojis = rng.sample(colors, k=rng.randint(1, 2))
         player_conditions.append(''.join(color_emojis))
-    if random.random() < 0.5:  # 50% chance to include direction
+    if rng.random() < 0.5:  # 50% chance to include direction
         directions = list(DIRECTIONS.keys())
-        dir_emojis = random.sample(directions, k=random.randint(1, 2))
+        dir_emojis = rng.sample(directions, k=rng.randint(1, 2))
         player_conditions.append(''.join(dir_emojis))
-    if random.random() < 0.5 or player_conditions == []:  # 50% chance to include item
+    if rng.random() < 0.5 or player_conditions == []:  # 50% chance to include item
         items = list(ITEMS.keys())
-        item_emojis = random.sample(items, k=random.randint(1, 2))
+        item_emojis = rng.sample(items, k=rng.randint(1, 2))
         player_conditions.append(''.join(item_emojis))
     
     return '🤖' + ''.join(player_conditions)
 
-def generate_random_rules(n: int) -> List[str]:
+def generate_random_rules(n: int, rng=random) -> List[str]:
     rule_set = []
 
     for _ in range(n):
-        rule_type = random.choice(["A", "B", "C"])  # Type A (⬆️🟥) ou B (🟦⬅️➡️)
-        negation = random.choice([True, False])
+        rule_type = rng.choice(["A", "B", "C"])  # Type A (⬆️🟥) ou B (🟦⬅️➡️)
+        negation = rng.choice([True, False])
         if rule_type == "A":
-            if random.random() < 0.5:  # 50% de chance d'avoir une direction
-                rule = generate_direction_condition_rule()
+            if rng.random() < 0.5:  # 50% de chance d'avoir une direction
+                rule = generate_direction_condition_rule(rng)
             else:
-                rule = generate_tile_condition_rule()
+                rule = generate_tile_condition_rule(rng)
         elif rule_type == "B":
-            rule = generate_player_condition_rule()
+            rule = generate_player_condition_rule(rng)
         else:
-            if random.random() < 1/3:
-                rule = f"🏁{generate_tile_condition_rule()}"
-            elif random.random() < 1/2:
-                rule = f"🏁{generate_direction_condition_rule()}"
+            if rng.random() < 1/3:
+                rule = f"🏁{generate_tile_condition_rule(rng)}"
+            elif rng.random() < 1/2:
+                rule = f"🏁{generate_direction_condition_rule(rng)}"
             else:
-                rule = f"🏁{generate_player_condition_rule()}"
+                rule = f"🏁{generate_player_condition_rule(rng)}"
 
         if rule_type != "C":
             rule += "➤"
-            rule_type = random.choice(["A", "B"])
+            rule_type = rng.choice(["A", "B"])
             if rule_type == "A":
-                rule += generate_direction_condition_rule()
+                rule += generate_direction_condition_rule(rng)
             else:
-                rule += generate_player_condition_rule()
+                rule += generate_player_condition_rule(rng)
 
         if negation:
             rule = "🚫" + rule
@@ -66,34 +72,264 @@ def generate_random_rules(n: int) -> List[str]:
 
     return rule_set
 
-def generate_random_grid(tiles: List[str], grid: List[List[str]]) -> List[List[str]]:
+def generate_random_grid(tiles: List[str], grid: List[List[str]], rng=random) -> List[List[str]]:
+    # Renvoie une nouvelle grille : le modèle (cases "" à remplir) n'est pas modifié
+    grid = [row[:] for row in grid]
     for i in range(len(grid)):
         for j in range(len(grid[0])):
             if grid[i][j] == "":
-                grid[i][j] = random.choice(tiles)
+                grid[i][j] = rng.choice(tiles)
     return grid
 
-def generate_valid_level(tiles: List[str], rules: List[str], action_rules: List[str], victory_rules: List[str], grid: List[List[str]], max_attempts: int = 10) -> Tuple[Level, List[str]]:
+# Bilan d'une génération : où passe le temps (règles écartées, grilles sans solution,
+# solutions trop courtes) et combien d'états les solveurs ont développés.
+class GenerationReport:
+    def __init__(self, timing: bool = False):
+        self.timing = timing
+        self.rule_sets = 0
+        self.rejected_rules: Dict[str, int] = {}   # verdict statique -> nombre
+        self.grids = 0
+        self.outcomes: Dict[str, int] = {}         # issue de la résolution -> nombre
+        self.too_short = 0
+        self.filtered = 0
+        self.duplicates = 0
+        self.nodes_expanded = 0
+        self.solve_seconds = 0.0
+        self.rule_seconds = 0.0
+        self.action_seconds = 0.0
+
+    def new_stats(self) -> SolverStats:
+        return SolverStats(timing=self.timing)
+
+    def add(self, stats: SolverStats):
+        self.grids += 1
+        self.outcomes[stats.outcome] = self.outcomes.get(stats.outcome, 0) + 1
+        self.nodes_expanded += stats.nodes_expanded
+        self.solve_seconds += stats.seconds
+        self.rule_seconds += stats.rule_seconds
+        self.action_seconds += stats.action_seconds
+
+    def reject(self, verdict: str):
+        self.rejected_rules[verdict] = self.rejected_rules.get(verdict, 0) + 1
+
+    def merge(self, other: "GenerationReport"):
+        # Cumule le bilan d'une tâche exécutée dans un autre processus
+        self.rule_sets += other.rule_sets
+        for verdict, count in other.rejected_rules.items():
+            self.rejected_rules[verdict] = self.rejected_rules.get(verdict, 0) + count
+        self.grids += other.grids
+        for outcome, count in other.outcomes.items():
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + count
+        self.too_short += other.too_short
+        self.filtered += other.filtered
+        self.duplicates += other.duplicates
+        self.nodes_expanded += other.nodes_expanded
+        self.solve_seconds += other.solve_seconds
+        self.rule_seconds += other.rule_seconds
+        self.action_seconds += other.action_seconds
+
+    def as_dict(self) -> Dict:
+        return {
+            "rule_sets": self.rule_sets,
+            "rejected_rules": self.rejected_rules,
+            "grids": self.grids,
+            "outcomes": self.outcomes,
+            "too_short": self.too_short,
+            "filtered": self.filtered,
+            "duplicates": self.duplicates,
+            "nodes_expanded": self.nodes_expanded,
+            "solve_seconds": self.solve_seconds,
+            "rule_seconds": self.rule_seconds,
+            "action_seconds": self.action_seconds,
+        }
+
+    def print(self):
+        print(f"Jeux de règles : {self.rule_sets} (écartés : {self.rejected_rules})")
+        print(f"Grilles résolues : {self.grids} {self.outcomes}, solutions trop courtes : {self.too_short}, filtrées : {self.filtered}, déjà vues : {self.duplicates}")
+        print(f"États développés : {self.nodes_expanded}, temps de résolution : {self.solve_seconds:.3f}s")
+        if self.timing:
+            print(f"  dont règles : {self.rule_seconds:.3f}s, actions : {self.action_seconds:.3f}s")
+
+def generate_valid_level(tiles: List[str], rules: List[str], action_rules: List[str], victory_rules: List[str], grid: List[List[str]], max_attempts: int = 10, engine: str = "bfs", rng=random, report: Optional[GenerationReport] = None, seen=None) -> Tuple[Level, List[str]]:
+    # seen (canonical.SeenSet ou BloomFilter) : les grilles déjà évaluées ne sont pas re-résolues
+    table = RuleTable.from_compiled(rules, action_rules, victory_rules) if seen is not None else None
     for _ in range(max_attempts):
-        grid = generate_random_grid(tiles, grid)
+        candidate = generate_random_grid(tiles, grid, rng)
         start = (0, 0)
-        level = Level(grid, start)
-        path = solve_level(level, rules, action_rules, victory_rules, start)
+        if seen is not None and not seen.add(level_key(candidate, start, table)):
+            if report is not None:
+                report.duplicates += 1
+            continue
+        level = Level(candidate, start)
+        stats = report.new_stats() if report is not None else None
+        # Grilles aléatoires jamais revues : pas de cache disque (il ne ferait que se remplir)
+        path = solve_level(level, rules, action_rules, victory_rules, start, engine=engine, stats=stats, cache=False)
+        if report is not None:
+            report.add(stats)
 
         if path:
             return level, path  # Valid level found
 
     raise ValueError("Impossible de générer un niveau faisable avec ces règles.")
 
-def generate_level(num_rules: int, min_length_solution: int, grid: List[List[str]]) -> Tuple[Level, List[str]]:
+def is_accepted_solution(solution: List[str], min_length_solution: int) -> bool:
+    return len(solution) >= min_length_solution and len(set(solution)) >= 3
+
+# Recherche locale : on part d'une grille aléatoire puis on ne modifie que quelques
+# cases libres à chaque pas, en gardant la grille si elle ne s'éloigne pas des objectifs
+# (longueur minimale, au moins 3 directions différentes).
+def generate_valid_level_local(tiles: List[str], rules: List[str], action_rules: List[str], victory_rules: List[str], grid: List[List[str]], min_length_solution: int, max_steps: int = 200, mutations: int = 2, patience: int = 20, rng=random, report: Optional[GenerationReport] = None, seen=None) -> Tuple[Level, List[str]]:
+    table = RuleTable.from_compiled(rules, action_rules, victory_rules)
+    start = (0, 0)
+    free_cells = [(x, y) for y, row in enumerate(grid) for x, tile in enumerate(row) if tile == ""]
+
+    def evaluate(candidate):
+        touched = set()
+        stats = report.new_stats() if report is not None else None
+        path = solve_bfs(Puzzle(candidate, table), State.make(start), touched=touched, stats=stats)
+        if report is not None:
+            report.add(stats)
+        if path is None:
+            return (0, 0, 0), path, touched
+        return (1, min(len(path), min_length_solution), min(len(set(path)), 3)), path, touched
+
+    current = generate_random_grid(tiles, grid, rng)
+    score, path, touched = evaluate(current)
+    stale = 0  # pas sans amélioration du score
+    for _ in range(max_steps):
+        if path and is_accepted_solution(path, min_length_solution):
+            if seen is not None and not seen.add(level_key(current, start, table)):
+                if report is not None:
+                    report.duplicates += 1
+                break  # niveau déjà produit : repartir d'autres règles
+            return Level(current, start), path
+        if not free_cells or stale >= patience:
+            break
+        stale += 1
+
+        candidate = [row[:] for row in current]
+        changed = rng.sample(free_cells, k=min(mutations, len(free_cells)))
+        for x, y in changed:
+            candidate[y][x] = rng.choice(tiles)
+
+        # Le solveur n'a lu aucune des cases modifiées : résultat identique sans re-résoudre
+        if not any(cell in touched for cell in changed):
+            current = candidate
+            continue
+
+        candidate_score, candidate_path, candidate_touched = evaluate(candidate)
+        if candidate_score > score:
+            stale = 0
+        if candidate_score >= score:
+            current, score, path, touched = candidate, candidate_score, candidate_path, candidate_touched
+
+    raise ValueError("Impossible de générer un niveau faisable avec ces règles.")
+
+def generate_level(num_rules: int, min_length_solution: int, grid: List[List[str]], engine: str = "bfs", rng=random, local_search: bool = False, report: Optional[GenerationReport] = None, require_unique: bool = False, min_difficulty: Optional[float] = None, seen=None) -> Tuple[Level, List[str]]:
+    # report (GenerationReport) cumule les statistiques de toutes les tentatives.
+    # require_unique / min_difficulty : filtres sur l'analyse du graphe d'états (level_analysis)
+    # seen (canonical.SeenSet ou BloomFilter) : niveaux déjà évalués, jamais renvoyés deux fois
     while True:
         try:
-            emoji_rules = generate_random_rules(num_rules)
+            emoji_rules = generate_random_rules(num_rules, rng)
             
             rules, action_rules, victory_rules = compile_rules(emoji_rules)
+            if report is not None:
+                report.rule_sets += 1
 
-            level, solution = generate_valid_level(list(COLORS.keys()), rules, action_rules, victory_rules, grid)
-            if len(solution) >= min_length_solution and len(set(solution)) >= 3:
-                return level, solution, emoji_rules
+            # Écarter sans construire de grille les règles impossibles ou trivialement résolues
+            verdict, reason = analyse_rules(RuleTable.from_compiled(rules, action_rules, victory_rules))
+            if verdict == IMPOSSIBLE or (verdict == TRIVIAL and min_length_solution > 1):
+                print(f"Règles écartées : {reason}. Réessayer...")
+                if report is not None:
+                    report.reject(verdict)
+                continue
+
+            if local_search:
+                level, solution = generate_valid_level_local(list(COLORS.keys()), rules, action_rules, victory_rules, grid, min_length_solution, rng=rng, report=report, seen=seen)
+            else:
+                level, solution = generate_valid_level(list(COLORS.keys()), rules, action_rules, victory_rules, grid, engine=engine, rng=rng, report=report, seen=seen)
+            if is_accepted_solution(solution, min_length_solution):
+                if not (require_unique or min_difficulty is not None):
+                    return level, solution, emoji_rules
+                analysis = analyse_level(Puzzle.from_level(level, rules, action_rules, victory_rules), level.state())
+                if (not require_unique or analysis.unique) and (min_difficulty is None or analysis.difficulty >= min_difficulty):
+                    return level, solution, emoji_rules
+                print(f"Niveau écarté : {analysis.solution_count} solutions, difficulté {analysis.difficulty:.1f}. Réessayer...")
+                if report is not None:
+                    report.filtered += 1
+                continue
+            if report is not None:
+                report.too_short += 1
         except ValueError as e:
             print(f"Erreur lors de la génération du niveau : {e}. Réessayer...")
+
+
+# Génération parallèle : chaque tâche a son propre générateur aléatoire initialisé par
+# une graine, un niveau est donc toujours reproductible à partir de sa graine.
+# Un ensemble seen ne se partage pas entre processus : les générateurs parallèles
+# l'appliquent dans le processus principal, aux niveaux renvoyés par les tâches.
+def generate_level_from_seed(seed: int, num_rules: int, min_length_solution: int, grid: List[List[str]], engine: str = "bfs", local_search: bool = False, require_unique: bool = False, min_difficulty: Optional[float] = None, seen=None, report: Optional[GenerationReport] = None) -> Dict:
+    rng = random.Random(seed)
+    try:
+        level, solution, emoji_rules = generate_level(num_rules, min_length_solution, grid, engine=engine, rng=rng, local_search=local_search,
+                                                      report=report, require_unique=require_unique, min_difficulty=min_difficulty, seen=seen)
+    finally:
+        from solve_cache import flush_default_cache
+        flush_default_cache()
+    return {
+        "grid": level.grid,
+        "start": level.start,
+        "emoji_rules": emoji_rules,
+        "solution": solution,
+        "seed": seed
+    }
+
+def generation_task(seed: int, num_rules: int, min_length_solution: int, grid: List[List[str]], engine: str, local_search: bool, require_unique: bool, min_difficulty: Optional[float], report: Optional[GenerationReport]) -> Tuple[Dict, Optional[GenerationReport]]:
+    # Tâche d'un processus de calcul : report est une copie vide, remplie ici puis
+    # renvoyée avec le niveau pour être cumulée par le processus principal (merge)
+    level = generate_level_from_seed(seed, num_rules, min_length_solution, grid, engine, local_search, require_unique, min_difficulty, report=report)
+    return level, report
+
+def is_new_level(level: Dict, seen=None, report: Optional[GenerationReport] = None) -> bool:
+    # Filtre seen appliqué dans le processus principal
+    if seen is None or seen.add(level_key_from_data(level)):
+        return True
+    if report is not None:
+        report.duplicates += 1
+    return False
+
+def iter_generated_levels(count: int, num_rules: int, min_length_solution: int, grid: List[List[str]], seed: int = 0, workers: Optional[int] = None, engine: str = "bfs", local_search: bool = False, require_unique: bool = False, min_difficulty: Optional[float] = None, seen=None, report: Optional[GenerationReport] = None) -> Iterator[Dict]:
+    # Renvoie count niveaux au fur et à mesure qu'ils sont trouvés (graines seed, seed + 1, ...).
+    # Un niveau déjà présent dans seen est remplacé par celui de la graine suivante.
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        def submit(task_seed):
+            return pool.submit(generation_task, task_seed, num_rules, min_length_solution, grid, engine, local_search,
+                               require_unique, min_difficulty, GenerationReport(report.timing) if report is not None else None)
+
+        pending = {submit(seed + k) for k in range(count)}
+        next_seed = seed + count
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                level, task_report = future.result()
+                if report is not None:
+                    report.merge(task_report)
+                if is_new_level(level, seen, report):
+                    yield level
+                else:
+                    pending.add(submit(next_seed))
+                    next_seed += 1
+
+def generate_levels(count: int, num_rules: int, min_length_solution: int, grid: List[List[str]], seed: int = 0, workers: Optional[int] = None, engine: str = "bfs", local_search: bool = False, require_unique: bool = False, min_difficulty: Optional[float] = None, seen=None, report: Optional[GenerationReport] = None) -> List[Dict]:
+    # Les count premiers niveaux nouveaux dans l'ordre des graines. seen est appliqué dans
+    # cet ordre, par lots : le résultat ne dépend pas de l'ordre de fin des tâches.
+    levels = []
+    next_seed = seed
+    while len(levels) < count:
+        missing = count - len(levels)
+        batch = iter_generated_levels(missing, num_rules, min_length_solution, grid, next_seed, workers, engine, local_search,
+                                      require_unique, min_difficulty, None, report)
+        levels += [level for level in sorted(batch, key=lambda level: level["seed"]) if is_new_level(level, seen, report)]
+        next_seed += missing
+    return levels
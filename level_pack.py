@@ -0,0 +1,184 @@
+from typing import List, Dict, Iterable, Iterator, Tuple
+import argparse
+import json
+import mmap
+import struct
+from pathlib import Path
+from rule_engine import TILE_CODES, TILE_EMOJIS, NO_TILE, MOVES, MOVE_CODES
+
+# Paquet de niveaux binaire : des milliers de niveaux dans un seul fichier, chacun
+# lisible sans analyser les autres (index d'offsets + mmap).
+#
+#   en-tête : MAGIC, version (u16), nombre de niveaux (u32)
+#   index   : offset (u64) du début de chaque niveau dans le fichier
+#   niveau  : largeur, hauteur, départ x, départ y (u8)
+#             grille : un octet par case (code couleur, NO_TILE pour une case vide)
+#             règles : nombre (u16) puis pour chacune longueur (u16) + texte UTF-8
+#             solution : longueur (u16) puis un octet par direction (longueur 0xFFFF = pas de solution)
+MAGIC = b"JEUPACK\0"
+VERSION = 1
+HEADER = struct.Struct("<8sHI")
+OFFSET = struct.Struct("<Q")
+DIMENSIONS = struct.Struct("<4B")
+LENGTH = struct.Struct("<H")
+NO_SOLUTION = 0xFFFF
+
+
+def encode_level(data: Dict) -> bytes:
+    grid = data["grid"]
+    height, width = len(grid), len(grid[0])
+    x, y = data["start"]
+    parts = [DIMENSIONS.pack(width, height, x, y)]
+
+    codes = bytearray()
+    for row in grid:
+        for tile in row:
+            if tile != "" and tile not in TILE_CODES:
+                raise ValueError(f"Case inconnue : {tile!r}")
+            codes.append(TILE_CODES.get(tile, NO_TILE))
+    parts.append(bytes(codes))
+
+    parts.append(LENGTH.pack(len(data["emoji_rules"])))
+    for rule in data["emoji_rules"]:
+        encoded = rule.encode("utf-8")
+        parts.append(LENGTH.pack(len(encoded)))
+        parts.append(encoded)
+
+    solution = data.get("solution")
+    if solution is None:
+        parts.append(LENGTH.pack(NO_SOLUTION))
+    else:
+        parts.append(LENGTH.pack(len(solution)))
+        parts.append(bytes(MOVE_CODES[direction] for direction in solution))
+    return b"".join(parts)
+
+def decode_level(buffer, offset: int) -> Dict:
+    # Même schéma que les fichiers JSON de Levels/ (grid, start, emoji_rules, solution)
+    width, height, x, y = DIMENSIONS.unpack_from(buffer, offset)
+    offset += DIMENSIONS.size
+    codes = buffer[offset:offset + width * height]
+    offset += width * height
+    grid = [[TILE_EMOJIS[code] if code != NO_TILE else "" for code in codes[row * width:(row + 1) * width]]
+            for row in range(height)]
+
+    (num_rules,) = LENGTH.unpack_from(buffer, offset)
+    offset += LENGTH.size
+    emoji_rules = []
+    for _ in range(num_rules):
+        (length,) = LENGTH.unpack_from(buffer, offset)
+        offset += LENGTH.size
+        emoji_rules.append(bytes(buffer[offset:offset + length]).decode("utf-8"))
+        offset += length
+
+    (length,) = LENGTH.unpack_from(buffer, offset)
+    offset += LENGTH.size
+    solution = None if length == NO_SOLUTION else [MOVES[code] for code in buffer[offset:offset + length]]
+
+    return {"grid": grid, "start": [x, y], "emoji_rules": emoji_rules, "solution": solution}
+
+
+def write_pack(path, levels: Iterable[Dict]) -> int:
+    # Écrit un paquet à partir de niveaux au format JSON, renvoie le nombre de niveaux
+    records = [encode_level(data) for data in levels]
+    offset = HEADER.size + OFFSET.size * len(records)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(records)))
+        for record in records:
+            f.write(OFFSET.pack(offset))
+            offset += len(record)
+        for record in records:
+            f.write(record)
+    return len(records)
+
+
+class LevelPack:
+    # Lecture d'un paquet par mmap : seul l'en-tête est lu à l'ouverture, un niveau
+    # n'est décodé que lorsqu'on y accède.
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        try:
+            self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # fichier vide
+            self._file.close()
+            raise ValueError(f"Paquet de niveaux invalide : {self.path}")
+        if len(self._buffer) < HEADER.size or HEADER.unpack_from(self._buffer, 0)[:2] != (MAGIC, VERSION):
+            self.close()
+            raise ValueError(f"Paquet de niveaux invalide : {self.path}")
+        self.count = HEADER.unpack_from(self._buffer, 0)[2]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> Dict:
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("Niveau hors du paquet")
+        (offset,) = OFFSET.unpack_from(self._buffer, HEADER.size + OFFSET.size * index)
+        return decode_level(self._buffer, offset)
+
+    def __iter__(self) -> Iterator[Dict]:
+        for index in range(self.count):
+            yield self[index]
+
+    def load_level(self, index: int) -> Tuple:
+        # Équivalent de game.load_level pour un niveau du paquet
+        from game import Level
+        from utils import compile_rules
+        data = self[index]
+        rules, action_rules, victory_rules = compile_rules(data["emoji_rules"], verbose=False)
+        return Level(data["grid"], tuple(data["start"])), rules, action_rules, victory_rules, data["solution"]
+
+    def close(self):
+        self._buffer.close()
+        self._file.close()
+
+    def __enter__(self) -> "LevelPack":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Conversion depuis / vers les fichiers JSON de Levels/
+def pack_json_files(paths: List, pack_path) -> int:
+    def levels():
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as f:
+                yield json.load(f)
+
+    return write_pack(pack_path, levels())
+
+def unpack_to_json(pack_path, directory, prefix: str = "level") -> List[Path]:
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    written = []
+    with LevelPack(pack_path) as pack:
+        for index, data in enumerate(pack):
+            path = directory / f"{prefix}{index + 1}.json"
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            written.append(path)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paquets de niveaux binaires")
+    commands = parser.add_subparsers(dest="command", required=True)
+    pack = commands.add_parser("pack", help="regrouper des niveaux JSON dans un paquet")
+    pack.add_argument("levels", nargs="+")
+    pack.add_argument("-o", "--output", required=True)
+    unpack = commands.add_parser("unpack", help="extraire les niveaux d'un paquet en JSON")
+    unpack.add_argument("pack")
+    unpack.add_argument("-o", "--output", required=True, help="dossier de destination")
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        print(f"{pack_json_files(args.levels, args.output)} niveaux écrits dans {args.output}")
+    else:
+        print(f"{len(unpack_to_json(args.pack, args.output))} niveaux extraits dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
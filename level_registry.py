@@ -0,0 +1,130 @@
+from typing import List, Dict, Iterator, Optional, Tuple
+import json
+import os
+from pathlib import Path
+from constants import PATH
+
+# Registre des niveaux de Levels/ : le dossier est indexé sans lire les fichiers, un
+# niveau n'est lu qu'à son premier accès (et relu s'il a été modifié depuis), et les
+# règles compilées sont partagées entre niveaux aux emoji_rules identiques.
+# Les niveaux d'un paquet binaire (level_pack) sont nommés "paquet.pack#index".
+
+MAX_COMPILED_RULES = 1024
+
+
+class LevelEntry:
+    __slots__ = ("name", "path", "index", "_data", "_mtime")
+
+    def __init__(self, name: str, path: Path, index: Optional[int] = None):
+        self.name = name
+        self.path = path
+        self.index = index  # position dans un paquet, None pour un fichier JSON
+        self._data = None
+        self._mtime = None
+
+    def data(self, registry: "LevelRegistry") -> Dict:
+        if self.index is not None:
+            if self._data is None:
+                self._data = registry.pack(self.path)[self.index]
+            return self._data
+        mtime = os.stat(self.path).st_mtime_ns
+        if self._data is None or mtime != self._mtime:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._data = json.load(f)
+            self._mtime = mtime
+        return self._data
+
+
+class LevelRegistry:
+    def __init__(self, directory=PATH / "Levels"):
+        self.directory = Path(directory)
+        self._entries: Optional[Dict[str, LevelEntry]] = None
+        self._packs = {}
+        self._compiled: Dict[Tuple[str, ...], Tuple] = {}
+
+    def refresh(self):
+        # Liste les fichiers sans les ouvrir ; un paquet n'est ouvert que pour lire son en-tête
+        entries = {}
+        for item in sorted(os.scandir(self.directory), key=lambda item: item.name):
+            if not item.is_file():
+                continue
+            if item.name.endswith(".json"):
+                entries[item.name] = LevelEntry(item.name, Path(item.path))
+            elif item.name.endswith(".pack"):
+                try:
+                    count = len(self.pack(Path(item.path)))
+                except ValueError:
+                    continue
+                for index in range(count):
+                    name = f"{item.name}#{index}"
+                    entries[name] = LevelEntry(name, Path(item.path), index)
+        # Les niveaux déjà lus gardent leur contenu
+        if self._entries is not None:
+            entries.update({name: entry for name, entry in self._entries.items() if name in entries})
+        self._entries = entries
+
+    def pack(self, path: Path):
+        from level_pack import LevelPack
+        pack = self._packs.get(path)
+        if pack is None:
+            pack = self._packs[path] = LevelPack(path)
+        return pack
+
+    def _index(self) -> Dict[str, LevelEntry]:
+        if self._entries is None:
+            self.refresh()
+        return self._entries
+
+    def names(self) -> List[str]:
+        return list(self._index())
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index())
+
+    def __len__(self) -> int:
+        return len(self._index())
+
+    def __contains__(self, name: str) -> bool:
+        return self.entry(name, required=False) is not None
+
+    def entry(self, name: str, required: bool = True) -> Optional[LevelEntry]:
+        entries = self._index()
+        entry = entries.get(name)
+        if entry is None and (self.directory / name).is_file():
+            # Fichier créé depuis l'indexation (save_level) ou dans un sous-dossier
+            entry = entries[name] = LevelEntry(name, self.directory / name)
+        if entry is None and required:
+            raise FileNotFoundError(f"Niveau introuvable : {name}")
+        return entry
+
+    def data(self, name: str) -> Dict:
+        # Niveau au format JSON (grid, start, emoji_rules, solution)
+        return self.entry(name).data(self)
+
+    def compiled_rules(self, emoji_rules: List[str]) -> Tuple:
+        key = tuple(emoji_rules)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            from utils import compile_rules
+            if len(self._compiled) >= MAX_COMPILED_RULES:
+                self._compiled.clear()
+            compiled = self._compiled[key] = compile_rules(emoji_rules, verbose=False)
+        return compiled
+
+    def load(self, name: str) -> Tuple:
+        # Même résultat que game.load_level : (niveau, règles, règles d'action, règles de victoire, solution)
+        from game import Level
+        data = self.data(name)
+        rules, action_rules, victory_rules = self.compiled_rules(data["emoji_rules"])
+        # Copies : le niveau se modifie en jeu, le contenu gardé en mémoire doit rester intact
+        grid = [row[:] for row in data["grid"]]
+        return Level(grid, tuple(data["start"])), rules, action_rules, victory_rules, list(data["solution"])
+
+
+_default_registry = None
+
+def default_registry() -> LevelRegistry:
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = LevelRegistry()
+    return _default_registry
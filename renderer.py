@@ -0,0 +1,100 @@
+from typing import List, Optional, Set, Tuple
+import os
+import sys
+from constants import PLAYER
+
+# Affichage incrémental de la grille : les cases dessinées sont gardées en mémoire et
+# seules celles qui changent (ancienne et nouvelle position du joueur, cases marquées
+# avec mark_dirty) sont redessinées, par positionnement du curseur (ANSI).
+# Sans support du curseur, chaque image est écrite d'un bloc ; seules les lignes
+# modifiées sont reconstruites.
+#
+# Disposition en mode ANSI : la grille occupe les premières lignes de l'écran (deux
+# colonnes par case : les cases vides "" sont dessinées avec EMPTY_CELL), puis une
+# ligne vide, le message et la ligne de saisie.
+
+EMPTY_CELL = "  "  # même largeur qu'un emoji
+
+
+def supports_ansi(stream) -> bool:
+    if not hasattr(stream, "isatty") or not stream.isatty() or os.environ.get("TERM") == "dumb":
+        return False
+    if os.name == "nt":
+        # Consoles Windows récentes : le mode VT est activé par un appel à os.system
+        if not any(name in os.environ for name in ("WT_SESSION", "ANSICON", "TERM_PROGRAM")):
+            return False
+        os.system("")
+    return True
+
+
+class TerminalRenderer:
+    def __init__(self, level, stream=None, ansi: Optional[bool] = None):
+        self.level = level
+        self.stream = stream or sys.stdout
+        self.ansi = supports_ansi(self.stream) if ansi is None else ansi
+        self.cells: List[List[str]] = []
+        self.rows: List[Optional[str]] = []  # texte de chaque ligne, None = à reconstruire
+        self.player_pos: Optional[Tuple[int, int]] = None
+        self.dirty: Set[Tuple[int, int]] = set()
+        self.text = ""  # dernier message, réécrit avec chaque image complète
+
+    def cell(self, x: int, y: int) -> str:
+        return PLAYER if (x, y) == self.level.player_pos else self.level.grid[y][x] or EMPTY_CELL
+
+    def mark_dirty(self, position: Tuple[int, int]):
+        # À appeler quand une case de la grille change de couleur
+        self.dirty.add(position)
+
+    def _prompt_line(self) -> str:
+        # Place le curseur sur la ligne de saisie (sous le message), vidée
+        line = len(self.cells) + 3 + self.text.count("\n")
+        return f"\x1b[{line};1H\x1b[J"
+
+    def draw(self):
+        # Image complète (première image, ou après un changement de taille)
+        self.cells = [[self.cell(x, y) for x in range(len(row))] for y, row in enumerate(self.level.grid)]
+        self.rows = ["".join(row) for row in self.cells]
+        self.player_pos = self.level.player_pos
+        self.dirty.clear()
+        if self.ansi:
+            self.stream.write("\x1b[2J\x1b[H" + "\n".join(self.rows) + f"\n\n{self.text}" + self._prompt_line())
+        else:
+            self.stream.write("\n".join(self.rows) + "\n\n")
+        self.stream.flush()
+
+    def update(self):
+        if len(self.cells) != len(self.level.grid) or not self.cells or len(self.cells[0]) != len(self.level.grid[0]):
+            return self.draw()
+
+        self.dirty.add(self.player_pos)
+        self.dirty.add(self.level.player_pos)
+        self.player_pos = self.level.player_pos
+
+        output = []
+        for x, y in self.dirty:
+            if not (0 <= y < len(self.cells) and 0 <= x < len(self.cells[0])):
+                continue
+            tile = self.cell(x, y)
+            if tile != self.cells[y][x]:
+                self.cells[y][x] = tile
+                self.rows[y] = None
+                if self.ansi:
+                    output.append(f"\x1b[{y + 1};{x * 2 + 1}H{tile}")
+        self.dirty.clear()
+
+        if self.ansi:
+            if output:
+                self.stream.write("".join(output) + self._prompt_line())
+        else:
+            self.rows = [row if row is not None else "".join(self.cells[y]) for y, row in enumerate(self.rows)]
+            self.stream.write("\n".join(self.rows) + "\n\n")
+        self.stream.flush()
+
+    def message(self, text: str):
+        if self.ansi:
+            self.text = text
+            if self.cells:  # sinon écrit avec la première image
+                self.stream.write(f"\x1b[{len(self.cells) + 2};1H\x1b[J{text}" + self._prompt_line())
+                self.stream.flush()
+        else:
+            print(text, file=self.stream)
@@ -0,0 +1,40 @@
+from typing import Optional, Tuple
+from rule_engine import RuleTable, MOVES, NO_TILE, make_profile
+
+# Analyse statique d'un jeu de règles, indépendante de la grille : toutes les tuiles
+# sont supposées disponibles, les conclusions valent donc pour n'importe quelle grille.
+IMPOSSIBLE = "impossible"
+TRIVIAL = "trivial"
+
+
+def analyse_rules(table: RuleTable, start_profile: int = None) -> Tuple[Optional[str], str]:
+    # Renvoie (IMPOSSIBLE | TRIVIAL | None, explication)
+    if start_profile is None:
+        start_profile = make_profile("WHITE", [])
+
+    if not any(table.allowed_mask(tile, start_profile) for tile in range(NO_TILE)):
+        return IMPOSSIBLE, "aucun déplacement n'est autorisé au départ"
+
+    # Arrivées possibles : (direction, profil après les règles d'action)
+    arrivals = set()
+    for profile in table.reachable_profiles(start_profile):
+        for tile in range(NO_TILE):
+            mask = table.allowed_mask(tile, profile)
+            for move in range(len(MOVES)):
+                if mask & (1 << move):
+                    arrivals.add((move, table.apply_actions(tile, move, profile)))
+
+    if not any(table.is_victory(tile, move, profile) for move, profile in arrivals for tile in range(NO_TILE)):
+        return IMPOSSIBLE, "aucune arrivée atteignable ne satisfait les règles de victoire"
+
+    # Trivial : tout premier déplacement autorisé gagne, quelle que soit la tuile d'arrivée
+    if all(
+        table.is_victory(arrival, move, table.apply_actions(tile, move, start_profile))
+        for tile in range(NO_TILE)
+        for move in range(len(MOVES))
+        if table.allowed_mask(tile, start_profile) & (1 << move)
+        for arrival in range(NO_TILE)
+    ):
+        return TRIVIAL, "le premier déplacement gagne toujours"
+
+    return None, "aucune conclusion statique"
@@ -0,0 +1,315 @@
+from typing import List, Dict, Callable, Tuple, NamedTuple, Optional
+import json
+from constants import COLORS, ITEMS
+
+# Codes utilisés par les tables : une tuile est un index de couleur, un "profil"
+# joueur combine sa couleur et son inventaire (bitset d'objets).
+TILE_EMOJIS = list(COLORS.keys())
+COLOR_NAMES = list(COLORS.values())
+TILE_CODES = {emoji: code for code, emoji in enumerate(TILE_EMOJIS)}
+COLOR_CODES = {name: code for code, name in enumerate(COLOR_NAMES)}
+NO_TILE = len(TILE_EMOJIS)  # hors grille ou case vide
+NUM_TILES = NO_TILE + 1
+
+ITEM_NAMES = list(ITEMS.values())
+ITEM_BITS = {name: 1 << i for i, name in enumerate(ITEM_NAMES)}
+NUM_INVENTORIES = 1 << len(ITEM_NAMES)
+NUM_PROFILES = len(COLOR_NAMES) * NUM_INVENTORIES
+
+MOVES = ["UP", "DOWN", "LEFT", "RIGHT"]
+MOVE_CODES = {direction: code for code, direction in enumerate(MOVES)}
+OFFSETS = [(0, -1), (0, 1), (-1, 0), (1, 0)]
+
+MAX_CACHED_TABLES = 1024
+_TABLE_CACHE: Dict[Tuple, "RuleTable"] = {}
+
+
+def inventory_bits(inventory: List[str]) -> int:
+    bits = 0
+    for item in inventory:
+        bits |= ITEM_BITS[item]
+    return bits
+
+def inventory_items(bits: int) -> List[str]:
+    return [name for name in ITEM_NAMES if bits & ITEM_BITS[name]]
+
+def make_profile(color: str, inventory: List[str]) -> int:
+    return COLOR_CODES[color] * NUM_INVENTORIES + inventory_bits(inventory)
+
+def profile_color(profile: int) -> str:
+    return COLOR_NAMES[profile // NUM_INVENTORIES]
+
+def profile_inventory(profile: int) -> int:
+    return profile % NUM_INVENTORIES
+
+
+# Évaluation pure d'une règle analysée, équivalente aux closures de compile_rule
+def test_condition(rule: Dict, tile: str, direction: str, color: str, inventory: int) -> bool:
+    condition = rule["if"]
+    test_if = True
+    if condition.get("type") == "tile_condition":
+        test_if = tile in condition["colors"]
+    elif condition.get("type") == "direction_condition":
+        test_if = direction in condition["directions"]
+    elif condition.get("type") == "player_condition":
+        if "colors" in condition:
+            test_if = test_if and color in condition["colors"]
+        if "directions" in condition:
+            test_if = test_if and direction in condition["directions"]
+        if "items" in condition:
+            test_if = test_if and any(inventory & ITEM_BITS[item] for item in condition["items"])
+
+    if rule["negation"]:
+        test_if = not test_if
+    return test_if
+
+def rule_holds(rule: Dict, tile: str, direction: str, color: str, inventory: int) -> bool:
+    test_if = test_condition(rule, tile, direction, color, inventory)
+    if rule["then"] == {}:
+        return test_if
+    if rule["then"]["type"] == "direction_condition":
+        return test_if or direction not in rule["then"]["directions"]
+    if rule["then"]["type"] == "player_condition":
+        return True
+    return False  # la closure renvoie None pour les autres conséquences
+
+def apply_action(rule: Dict, tile: str, direction: str, color: str, inventory: int) -> Tuple[str, int]:
+    if test_condition(rule, tile, direction, color, inventory):
+        inventory |= inventory_bits(rule["then"].get("items", []))
+        color = rule["then"].get("colors", [color])[0]
+    return color, inventory
+
+
+# Forme canonique d'une règle analysée : l'ordre et les doublons des listes ne comptent
+# pas (tests d'appartenance), et une règle d'action n'applique que sa première couleur.
+def canonical_rule(rule: Dict) -> Dict:
+    def canonical_part(part):
+        result = {}
+        for name, value in part.items():
+            result[name] = sorted(set(value)) if isinstance(value, list) else value
+        return result
+
+    then = canonical_part(rule["then"])
+    if rule["then"].get("colors"):
+        then["colors"] = rule["then"]["colors"][:1]
+    return {"win": rule["win"], "negation": rule["negation"], "if": canonical_part(rule["if"]), "then": then}
+
+def canonical_rules_key(rules: List[Dict], action_rules: List[Dict], victory_rules: List[Dict]) -> Tuple:
+    # Les règles de déplacement et de victoire forment des conjonctions (ordre et doublons
+    # sans effet) ; les règles d'action s'appliquent l'une après l'autre, leur ordre compte.
+    def key(rule):
+        return json.dumps(canonical_rule(rule), sort_keys=True, ensure_ascii=False)
+
+    return (
+        tuple(sorted({key(rule) for rule in rules})),
+        tuple(key(rule) for rule in action_rules),
+        tuple(sorted({key(rule) for rule in victory_rules})),
+    )
+
+
+class RuleTable:
+    # Tables indexées par (tuile, direction, profil) :
+    #   allowed[tile * NUM_PROFILES + profile] -> masque des directions permises
+    #   actions[(tile * 4 + move) * NUM_PROFILES + profile] -> profil après les règles d'action
+    #   victory[(tile * 4 + move) * NUM_PROFILES + profile] -> victoire en arrivant sur la tuile
+    # Les entrées sont calculées à la première consultation (-1 / None = pas encore calculée).
+    # Comme dans les solveurs, les règles de déplacement reçoivent le nom de la couleur
+    # de la tuile tandis que les règles d'action et de victoire reçoivent l'emoji brut.
+    # Les déplacements déclenchés par une règle d'action ne sont pas tabulés : les
+    # solveurs ne les prennent pas en compte.
+    def __init__(self, rules: List[Dict], action_rules: List[Dict], victory_rules: List[Dict]):
+        self.rules = rules
+        self.action_rules = action_rules
+        self.victory_rules = victory_rules
+
+        self.allowed = [-1] * (NUM_TILES * NUM_PROFILES)
+        self.actions = [-1] * (NUM_TILES * len(MOVES) * NUM_PROFILES)
+        self.victory = [None] * (NUM_TILES * len(MOVES) * NUM_PROFILES)
+        self._victory_tiles = None
+        self._inverse = {}
+
+    @classmethod
+    def from_compiled(cls, rules: List[Callable], action_rules: List[Callable], victory_rules: List[Callable]) -> "RuleTable":
+        # Les closures de compile_rule gardent leur règle analysée dans l'attribut `rule`.
+        # Des jeux de règles équivalents (forme canonique identique) partagent leur table.
+        key = canonical_rules_key([rule.rule for rule in rules], [rule.rule for rule in action_rules], [rule.rule for rule in victory_rules])
+        table = _TABLE_CACHE.get(key)
+        if table is None:
+            if len(_TABLE_CACHE) >= MAX_CACHED_TABLES:
+                _TABLE_CACHE.clear()
+            table = cls(
+                [rule.rule for rule in rules],
+                [rule.rule for rule in action_rules],
+                [rule.rule for rule in victory_rules],
+            )
+            _TABLE_CACHE[key] = table
+        return table
+
+    def allowed_mask(self, tile: int, profile: int) -> int:
+        index = tile * NUM_PROFILES + profile
+        mask = self.allowed[index]
+        if mask < 0:
+            mask = 0
+            if tile != NO_TILE:
+                color, inventory = profile_color(profile), profile_inventory(profile)
+                for move, direction in enumerate(MOVES):
+                    if all(rule_holds(rule, COLOR_NAMES[tile], direction, color, inventory) for rule in self.rules):
+                        mask |= 1 << move
+            self.allowed[index] = mask
+        return mask
+
+    def apply_actions(self, tile: int, move: int, profile: int) -> int:
+        index = (tile * len(MOVES) + move) * NUM_PROFILES + profile
+        new_profile = self.actions[index]
+        if new_profile < 0:
+            tile_emoji = TILE_EMOJIS[tile] if tile != NO_TILE else None
+            color, inventory = profile_color(profile), profile_inventory(profile)
+            for rule in self.action_rules:
+                color, inventory = apply_action(rule, tile_emoji, MOVES[move], color, inventory)
+            new_profile = COLOR_CODES[color] * NUM_INVENTORIES + inventory
+            self.actions[index] = new_profile
+        return new_profile
+
+    def is_victory(self, tile: int, move: int, profile: int) -> bool:
+        index = (tile * len(MOVES) + move) * NUM_PROFILES + profile
+        won = self.victory[index]
+        if won is None:
+            tile_emoji = TILE_EMOJIS[tile] if tile != NO_TILE else None
+            color, inventory = profile_color(profile), profile_inventory(profile)
+            won = all(rule_holds(rule, tile_emoji, MOVES[move], color, inventory) for rule in self.victory_rules)
+            self.victory[index] = won
+        return won
+
+    def victory_tiles(self) -> List[int]:
+        # Tuiles sur lesquelles une arrivée peut être victorieuse (pour un profil et une direction),
+        # NO_TILE compris : une case vide peut faire gagner.
+        # Les règles de victoire testent l'emoji de la tuile, jamais égal à un nom de
+        # couleur : en pratique la liste contient toutes les tuiles ou aucune.
+        if self._victory_tiles is None:
+            def can_win(tile):
+                return any(self.is_victory(tile, move, profile) for move in range(len(MOVES)) for profile in range(NUM_PROFILES))
+
+            if any(rule["if"].get("type") == "tile_condition" for rule in self.victory_rules):
+                self._victory_tiles = [tile for tile in range(NUM_TILES) if can_win(tile)]
+            else:
+                # La tuile n'intervient pas : une seule tuile suffit à conclure
+                self._victory_tiles = list(range(NUM_TILES)) if can_win(0) else []
+        return self._victory_tiles
+
+    def reachable_profiles(self, start_profile: int) -> List[int]:
+        # Profils atteignables depuis start_profile sur une grille quelconque
+        # (sur-approximation : toutes les tuiles sont supposées disponibles)
+        seen = {start_profile}
+        stack = [start_profile]
+        while stack:
+            profile = stack.pop()
+            for tile in range(NO_TILE):
+                mask = self.allowed_mask(tile, profile)
+                for move in range(len(MOVES)):
+                    if mask & (1 << move):
+                        new_profile = self.apply_actions(tile, move, profile)
+                        if new_profile not in seen:
+                            seen.add(new_profile)
+                            stack.append(new_profile)
+        return sorted(seen)
+
+    def inverse_actions(self, tile: int, move: int) -> Dict[int, List[int]]:
+        # Profil après les règles d'action -> profils de départ possibles
+        key = tile * len(MOVES) + move
+        inverse = self._inverse.get(key)
+        if inverse is None:
+            inverse = {}
+            for profile in range(NUM_PROFILES):
+                inverse.setdefault(self.apply_actions(tile, move, profile), []).append(profile)
+            self._inverse[key] = inverse
+        return inverse
+
+    def fill(self) -> "RuleTable":
+        # Calcule toutes les entrées d'avance (analyse statique, export des tables)
+        for tile in range(NUM_TILES):
+            for profile in range(NUM_PROFILES):
+                self.allowed_mask(tile, profile)
+                for move in range(len(MOVES)):
+                    self.apply_actions(tile, move, profile)
+                    self.is_victory(tile, move, profile)
+        return self
+
+
+
+# État du joueur immuable : position et profil (couleur + inventaire)
+class State(NamedTuple):
+    pos: Tuple[int, int]
+    profile: int
+
+    @classmethod
+    def make(cls, pos: Tuple[int, int], color: str = "WHITE", inventory: List[str] = ()) -> "State":
+        return cls(tuple(pos), make_profile(color, inventory))
+
+    @property
+    def color(self) -> str:
+        return profile_color(self.profile)
+
+    @property
+    def inventory(self) -> int:
+        return profile_inventory(self.profile)
+
+
+# Transitions pures d'un niveau : une grille et une table de règles, sans état joueur.
+# Un même Puzzle peut être partagé entre solveurs, threads ou parties.
+class Puzzle:
+    def __init__(self, grid: List[List[str]], table: RuleTable):
+        self.grid = grid
+        self.table = table
+        self.height, self.width = len(grid), len(grid[0])
+        self.tiles = [[TILE_CODES.get(tile, NO_TILE) for tile in row] for row in grid]
+        self.in_bounds = [
+            [sum(1 << move for move, (dx, dy) in enumerate(OFFSETS) if 0 <= x + dx < self.width and 0 <= y + dy < self.height)
+             for x in range(self.width)]
+            for y in range(self.height)
+        ]
+
+    def check(self, start: State):
+        # Niveau lu depuis un fichier ou une requête : grille rectangulaire et départ
+        # dans la grille (une coordonnée négative indexerait la grille depuis la fin)
+        if any(len(row) != self.width for row in self.grid):
+            raise ValueError("grille non rectangulaire")
+        x, y = start.pos
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise ValueError(f"départ {start.pos} hors de la grille")
+
+    @classmethod
+    def from_level(cls, level, rules: List[Callable], action_rules: List[Callable], victory_rules: List[Callable]) -> "Puzzle":
+        return cls(level.grid, RuleTable.from_compiled(rules, action_rules, victory_rules))
+
+    # Identifiant entier d'un état : (case, profil) -> 0 .. largeur * hauteur * NUM_PROFILES - 1
+    def state_id(self, state: State) -> int:
+        x, y = state.pos
+        return (y * self.width + x) * NUM_PROFILES + state.profile
+
+    def state_from_id(self, state_id: int) -> State:
+        cell, profile = divmod(state_id, NUM_PROFILES)
+        y, x = divmod(cell, self.width)
+        return State((x, y), profile)
+
+    def allowed_mask(self, state: State) -> int:
+        x, y = state.pos
+        return self.table.allowed_mask(self.tiles[y][x], state.profile) & self.in_bounds[y][x]
+
+    def allowed_moves(self, state: State) -> List[str]:
+        mask = self.allowed_mask(state)
+        return [direction for move, direction in enumerate(MOVES) if mask & (1 << move)]
+
+    def step(self, state: State, direction: str) -> Optional[State]:
+        # Nouvel état après un déplacement, ou None si le déplacement est interdit
+        move = MOVE_CODES[direction]
+        (x, y), profile = state
+        tile = self.tiles[y][x]
+        if not self.table.allowed_mask(tile, profile) & self.in_bounds[y][x] & (1 << move):
+            return None
+        dx, dy = OFFSETS[move]
+        return State((x + dx, y + dy), self.table.apply_actions(tile, move, profile))
+
+    def is_victory(self, state: State, direction: str) -> bool:
+        # Victoire en arrivant dans `state` par `direction`
+        x, y = state.pos
+        return self.table.is_victory(self.tiles[y][x], MOVE_CODES[direction], state.profile)
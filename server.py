@@ -0,0 +1,242 @@
+from typing import Dict, Optional, Tuple
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+from constants import PATH
+from rule_engine import Puzzle, State, MOVES, inventory_items
+from utils import compile_rules
+
+# Serveur de parties sans affichage : une ligne JSON par requête et par réponse, sur
+# une socket locale (TCP ou Unix) ou sur stdin / stdout.
+#
+#   {"cmd": "new", "level": "test.json"}           -> session, état et grille du niveau
+#   {"cmd": "move", "session": 1, "direction": "UP"} -> moved, won, état
+#   {"cmd": "state", "session": 1}                 -> état
+#   {"cmd": "grid", "session": 1}                  -> grille du niveau
+#   {"cmd": "reset", "session": 1}                 -> état initial
+#   {"cmd": "close", "session": 1}
+#
+# Un champ "id" éventuel est renvoyé tel quel. Les erreurs donnent {"ok": false, "error": ...}.
+
+
+class SharedLevel:
+    # Un niveau chargé une fois, partagé par toutes les sessions qui y jouent
+    __slots__ = ("name", "puzzle", "start", "sessions")
+
+    def __init__(self, name: str, puzzle: Puzzle, start: State):
+        self.name = name
+        self.puzzle = puzzle
+        self.start = start
+        self.sessions = 0
+
+
+class Session:
+    # État propre à un joueur : quelques champs seulement, le reste est partagé
+    __slots__ = ("level", "state", "moves", "won", "last_seen")
+
+    def __init__(self, level: SharedLevel):
+        self.level = level
+        self.state = level.start
+        self.moves = 0
+        self.won = False
+        self.last_seen = time.monotonic()
+
+
+class SessionManager:
+    def __init__(self, levels_dir=PATH / "Levels", max_sessions: int = 100_000, idle_timeout: float = 3600):
+        self.levels_dir = levels_dir
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.levels: Dict[str, SharedLevel] = {}
+        self.sessions: Dict[int, Session] = {}
+        self._ids = itertools.count(1)
+
+    def load(self, name: str) -> SharedLevel:
+        level = self.levels.get(name)
+        if level is None:
+            path = (self.levels_dir / name).resolve()
+            if self.levels_dir.resolve() not in path.parents:
+                raise ValueError(f"Niveau inconnu : {name}")
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            table = compile_rules(data["emoji_rules"], table=True, verbose=False)
+            try:
+                puzzle, start = Puzzle(data["grid"], table), State.make(data["start"])
+                puzzle.check(start)
+            except (IndexError, TypeError, ValueError) as e:
+                raise ValueError(f"Niveau invalide : {name} ({e})")
+            level = SharedLevel(name, puzzle, start)
+            self.levels[name] = level
+        return level
+
+    def new_session(self, name: str) -> Tuple[int, Session]:
+        if len(self.sessions) >= self.max_sessions:
+            self.expire()
+            if len(self.sessions) >= self.max_sessions:
+                raise ValueError("Trop de sessions ouvertes")
+        level = self.load(name)
+        session_id = next(self._ids)
+        self.sessions[session_id] = Session(level)
+        level.sessions += 1
+        return session_id, self.sessions[session_id]
+
+    def get(self, session_id) -> Session:
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise ValueError(f"Session inconnue : {session_id}")
+        session.last_seen = time.monotonic()
+        return session
+
+    def close(self, session_id):
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            self._release(session)
+
+    def _release(self, session: Session):
+        session.level.sessions -= 1
+        if session.level.sessions == 0:
+            del self.levels[session.level.name]
+
+    def expire(self):
+        # Ferme les sessions inactives depuis plus de idle_timeout secondes
+        limit = time.monotonic() - self.idle_timeout
+        for session_id in [session_id for session_id, session in self.sessions.items() if session.last_seen < limit]:
+            self._release(self.sessions.pop(session_id))
+
+    def move(self, session: Session, direction: str) -> bool:
+        if session.won:
+            raise ValueError("Partie terminée")
+        if direction not in MOVES:
+            raise ValueError(f"Direction inconnue : {direction}")
+        new_state = session.level.puzzle.step(session.state, direction)
+        if new_state is None:
+            return False
+        session.state = new_state
+        session.moves += 1
+        session.won = session.level.puzzle.is_victory(new_state, direction)
+        return True
+
+    def handle(self, request: Dict) -> Dict:
+        command = request.get("cmd")
+        if command == "new":
+            session_id, session = self.new_session(request["level"])
+            return dict(describe(session), session=session_id, grid=session.level.puzzle.grid)
+        if command == "close":
+            self.close(request.get("session"))
+            return {}
+
+        session = self.get(request.get("session"))
+        if command == "move":
+            moved = self.move(session, str(request.get("direction", "")).upper())
+            return dict(describe(session), moved=moved)
+        if command == "state":
+            return describe(session)
+        if command == "grid":
+            return {"grid": session.level.puzzle.grid}
+        if command == "reset":
+            session.state, session.moves, session.won = session.level.start, 0, False
+            return describe(session)
+        raise ValueError(f"Commande inconnue : {command}")
+
+    def handle_line(self, line: str) -> Optional[str]:
+        if not line.strip():
+            return None
+        request = {}
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("Requête JSON attendue")
+            response = dict(self.handle(request), ok=True)
+        except Exception as e:
+            # Une requête en erreur ne doit jamais couper la connexion du client
+            response = {"ok": False, "error": str(e) or type(e).__name__}
+        if isinstance(request, dict) and "id" in request:
+            response["id"] = request["id"]
+        return json.dumps(response, ensure_ascii=False)
+
+
+def describe(session: Session) -> Dict:
+    return {
+        "pos": list(session.state.pos),
+        "color": session.state.color,
+        "inventory": inventory_items(session.state.inventory),
+        "moves": session.moves,
+        "won": session.won,
+    }
+
+
+async def serve_stream(manager: SessionManager, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            response = manager.handle_line(line.decode("utf-8", errors="replace"))
+            if response is not None:
+                writer.write((response + "\n").encode("utf-8"))
+                await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+async def expire_loop(manager: SessionManager, interval: float = 60):
+    while True:
+        await asyncio.sleep(interval)
+        manager.expire()
+
+async def serve_socket(manager: SessionManager, host: str = "127.0.0.1", port: int = 8765, unix_path: Optional[str] = None):
+    def handler(reader, writer):
+        return serve_stream(manager, reader, writer)
+
+    if unix_path:
+        server = await asyncio.start_unix_server(handler, path=unix_path)
+    else:
+        server = await asyncio.start_server(handler, host, port)
+    print(f"Serveur prêt : {unix_path or f'{host}:{port}'}", file=sys.stderr)
+    expiry = asyncio.create_task(expire_loop(manager))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        expiry.cancel()
+
+async def serve_stdio(manager: SessionManager):
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        response = manager.handle_line(line.decode("utf-8", errors="replace"))
+        if response is not None:
+            sys.stdout.write(response + "\n")
+            sys.stdout.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur de parties (JSON ligne à ligne)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="chemin d'une socket Unix à la place de TCP")
+    parser.add_argument("--stdio", action="store_true", help="lire les requêtes sur stdin")
+    parser.add_argument("--max-sessions", type=int, default=100_000)
+    parser.add_argument("--idle-timeout", type=float, default=3600, help="secondes avant fermeture d'une session inactive")
+    args = parser.parse_args()
+
+    manager = SessionManager(max_sessions=args.max_sessions, idle_timeout=args.idle_timeout)
+    try:
+        if args.stdio:
+            asyncio.run(serve_stdio(manager))
+        else:
+            asyncio.run(serve_socket(manager, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
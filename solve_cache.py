@@ -0,0 +1,173 @@
+from typing import List, Optional, Tuple
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from constants import PATH
+from rule_engine import RuleTable, State, canonical_rules_key
+
+# Cache disque des résolutions, adressé par le contenu : la clé est un hash de la
+# grille, de l'état de départ, des règles (forme canonique) et des paramètres du solveur.
+# La valeur est la solution la plus courte, ou "sans solution".
+# Les erreurs SQLite ne sont jamais fatales : le cache se désactive et on résout.
+
+CACHE_VERSION = 1  # à incrémenter si la sémantique des solveurs change
+DEFAULT_PATH = PATH / ".solve_cache.sqlite"
+DEFAULT_MAX_ENTRIES = 100_000
+
+
+def solve_key(grid: List[List[str]], start: State, table: RuleTable, engine: str, max_length: int, max_nodes: Optional[int]) -> str:
+    content = json.dumps([
+        CACHE_VERSION,
+        grid,
+        list(start.pos),
+        start.profile,
+        canonical_rules_key(table.rules, table.action_rules, table.victory_rules),
+        engine,
+        max_length,
+        max_nodes,
+    ], ensure_ascii=False)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class SolveCache:
+    # Les écritures sont regroupées (une transaction toutes les batch_size écritures) ;
+    # au-delà de max_entries, les entrées les moins récemment utilisées sont supprimées.
+    def __init__(self, path=DEFAULT_PATH, max_entries: int = DEFAULT_MAX_ENTRIES, batch_size: int = 64):
+        self.path = path
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+        self._pending = {}  # clé -> (solution JSON, date d'utilisation)
+        self._entries = None  # majorant du nombre d'entrées, compté au premier flush
+        self._connection = None
+        try:
+            self._connection = sqlite3.connect(str(path), timeout=5)
+            self._connection.execute("PRAGMA journal_mode=WAL")  # plusieurs processus de génération
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS solves (key TEXT PRIMARY KEY, solution TEXT, used REAL NOT NULL)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS solves_used ON solves (used)")
+            self._connection.commit()
+        except sqlite3.Error as e:
+            self._disable(e)
+
+    @property
+    def enabled(self) -> bool:
+        return self._connection is not None
+
+    def _disable(self, error):
+        print(f"Cache de résolution désactivé : {error}")
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except sqlite3.Error:
+                pass
+        self._connection = None
+        self._pending.clear()
+
+    def get(self, key: str) -> Tuple[bool, Optional[List[str]]]:
+        # (trouvé, solution) ; solution None = niveau sans solution
+        entry = self._pending.get(key)
+        if entry is None and self.enabled:
+            try:
+                row = self._connection.execute("SELECT solution FROM solves WHERE key = ?", (key,)).fetchone()
+            except sqlite3.Error as e:
+                self._disable(e)
+                row = None
+            if row is not None:
+                entry = (row[0], time.time())
+                self._queue(key, entry)  # met à jour la date d'utilisation
+        if entry is None:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        return True, json.loads(entry[0])
+
+    def put(self, key: str, solution: Optional[List[str]]):
+        if self.enabled:
+            self._queue(key, (json.dumps(solution), time.time()))
+
+    def _queue(self, key: str, entry: Tuple[str, float]):
+        self._pending[key] = entry
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending or not self.enabled:
+            return
+        try:
+            with self._connection:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO solves (key, solution, used) VALUES (?, ?, ?)",
+                    [(key, solution, used) for key, (solution, used) in self._pending.items()])
+                # Les entrées ne sont recomptées que quand le majorant dépasse max_entries
+                # (une écriture peut remplacer une entrée existante)
+                if self._entries is not None:
+                    self._entries += len(self._pending)
+                if self._entries is None or self._entries > self.max_entries:
+                    (self._entries,) = self._connection.execute("SELECT COUNT(*) FROM solves").fetchone()
+                if self._entries > self.max_entries:
+                    # On redescend à 90 % de la taille maximale
+                    self._connection.execute(
+                        "DELETE FROM solves WHERE key IN (SELECT key FROM solves ORDER BY used LIMIT ?)",
+                        (self._entries - self.max_entries * 9 // 10,))
+                    self._entries = self.max_entries * 9 // 10
+            self._pending.clear()
+        except sqlite3.Error as e:
+            self._disable(e)
+
+    def clear(self):
+        self._pending.clear()
+        if self.enabled:
+            try:
+                with self._connection:
+                    self._connection.execute("DELETE FROM solves")
+                self._entries = 0
+            except sqlite3.Error as e:
+                self._disable(e)
+
+    def close(self):
+        self.flush()
+        if self.enabled:
+            self._connection.close()
+            self._connection = None
+
+
+# Cache partagé utilisé par défaut par utils.solve_level. JEU_SOLVE_CACHE choisit le
+# fichier, JEU_SOLVE_CACHE=0 le désactive.
+# Une connexion SQLite ne doit pas traverser un fork : chaque processus ouvre la sienne.
+_UNSET = object()
+_default_cache = _UNSET
+_default_pid = None
+
+def get_default_cache() -> Optional[SolveCache]:
+    global _default_cache, _default_pid
+    if _default_cache is _UNSET:
+        setting = os.environ.get("JEU_SOLVE_CACHE", "")
+        _default_cache = None if setting == "0" else SolveCache(setting or DEFAULT_PATH)
+        _default_pid = os.getpid()
+        if _default_cache is not None:
+            atexit.register(_default_cache.close)
+    elif _default_cache is not None and _default_pid != os.getpid():
+        # Processus fils : nouvelle connexion sur le même fichier (écritures en attente abandonnées)
+        _default_cache = SolveCache(_default_cache.path, _default_cache.max_entries, _default_cache.batch_size)
+        _default_pid = os.getpid()
+        atexit.register(_default_cache.close)
+    if _default_cache is None or not _default_cache.enabled:
+        return None
+    return _default_cache
+
+def flush_default_cache():
+    # Les processus d'un ProcessPoolExecutor se terminent sans passer par atexit : une
+    # tâche exécutée dans un processus de calcul écrit ses résultats avant de se terminer
+    if _default_cache is not _UNSET and _default_cache is not None and _default_pid == os.getpid():
+        _default_cache.flush()
+
+def set_default_cache(cache: Optional[SolveCache]):
+    # None désactive le cache par défaut
+    global _default_cache, _default_pid
+    _default_cache = cache
+    _default_pid = os.getpid()
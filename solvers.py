@@ -0,0 +1,414 @@
+from typing import List, Dict, Callable, Optional, Set, Tuple
+from collections import deque
+import heapq
+import time
+from rule_engine import Puzzle, RuleTable, State, MOVES, OFFSETS
+
+# Moteurs de résolution : tous prennent un Puzzle et un état de départ et renvoient
+# la liste des directions d'une solution la plus courte (au plus max_length coups),
+# ou None. max_nodes borne le nombre d'états développés, stats (SolverStats) collecte
+# les statistiques et appelle les callbacks.
+
+# Issues possibles d'une résolution
+SOLVED = "solved"
+DEPTH_LIMIT = "depth_limit"          # des états restaient à explorer au-delà de max_length
+NODE_LIMIT = "node_limit"            # max_nodes atteint
+EXHAUSTED = "exhausted"              # plus aucun état atteignable
+NO_VICTORY_TILE = "no_victory_tile"  # aucune case ne peut déclencher la victoire
+
+
+class SolverStats:
+    # Statistiques d'une résolution et callbacks optionnels :
+    #   on_expand(state, depth), on_solution(path), on_prune(state, direction, reason)
+    # Avec timing=True, le temps passé dans les règles de déplacement et de victoire
+    # est séparé de celui des règles d'action (mesure coûteuse, désactivée par défaut).
+    def __init__(self, timing: bool = False, on_expand: Callable = None, on_solution: Callable = None, on_prune: Callable = None):
+        self.timing = timing
+        self.on_expand = on_expand
+        self.on_solution = on_solution
+        self.on_prune = on_prune
+
+        self.engine = None
+        self.outcome = None
+        self.solution_length = None
+        self.nodes_expanded = 0
+        self.peak_queue = 0
+        self.visited = 0
+        self.pruned = 0
+        self.branching = {}  # profondeur -> [états développés, successeurs]
+        self.rule_seconds = 0.0
+        self.action_seconds = 0.0
+        self.seconds = 0.0
+        self._started = None
+
+    def begin(self, engine: str, puzzle: Puzzle) -> Puzzle:
+        self.engine = engine
+        self._started = time.perf_counter()
+        if self.timing:
+            return Puzzle(puzzle.grid, TimedTable(puzzle.table, self))
+        return puzzle
+
+    def expand(self, state: State, depth: int, successors: int):
+        self.nodes_expanded += 1
+        layer = self.branching.setdefault(depth, [0, 0])
+        layer[0] += 1
+        layer[1] += successors
+        if self.on_expand is not None:
+            self.on_expand(state, depth)
+
+    def layer(self, depth: int, expanded: int, successors: int):
+        # Variante agrégée de expand, pour les moteurs vectorisés
+        self.nodes_expanded += expanded
+        layer = self.branching.setdefault(depth, [0, 0])
+        layer[0] += expanded
+        layer[1] += successors
+
+    def prune(self, state: State, direction: str, reason: str):
+        self.pruned += 1
+        if self.on_prune is not None:
+            self.on_prune(state, direction, reason)
+
+    def queue_size(self, size: int):
+        if size > self.peak_queue:
+            self.peak_queue = size
+
+    def finish(self, outcome: str, visited: int, path: Optional[List[str]] = None) -> Optional[List[str]]:
+        self.outcome = outcome
+        self.visited = visited
+        self.seconds = time.perf_counter() - self._started
+        if path is not None:
+            self.solution_length = len(path)
+            if self.on_solution is not None:
+                self.on_solution(path)
+        return path
+
+    def branching_factors(self) -> Dict[int, float]:
+        return {depth: successors / expanded for depth, (expanded, successors) in sorted(self.branching.items()) if expanded}
+
+    def as_dict(self) -> Dict:
+        return {
+            "engine": self.engine,
+            "outcome": self.outcome,
+            "solution_length": self.solution_length,
+            "nodes_expanded": self.nodes_expanded,
+            "peak_queue": self.peak_queue,
+            "visited": self.visited,
+            "pruned": self.pruned,
+            "branching": self.branching_factors(),
+            "rule_seconds": self.rule_seconds,
+            "action_seconds": self.action_seconds,
+            "seconds": self.seconds,
+        }
+
+
+class TimedTable:
+    # Enveloppe d'une RuleTable qui chronomètre les consultations pour SolverStats
+    def __init__(self, table: RuleTable, stats: SolverStats):
+        self._table = table
+        self._stats = stats
+
+    def __getattr__(self, name):
+        return getattr(self._table, name)
+
+    def allowed_mask(self, tile: int, profile: int) -> int:
+        started = time.perf_counter()
+        mask = self._table.allowed_mask(tile, profile)
+        self._stats.rule_seconds += time.perf_counter() - started
+        return mask
+
+    def is_victory(self, tile: int, move: int, profile: int) -> bool:
+        started = time.perf_counter()
+        won = self._table.is_victory(tile, move, profile)
+        self._stats.rule_seconds += time.perf_counter() - started
+        return won
+
+    def apply_actions(self, tile: int, move: int, profile: int) -> int:
+        started = time.perf_counter()
+        new_profile = self._table.apply_actions(tile, move, profile)
+        self._stats.action_seconds += time.perf_counter() - started
+        return new_profile
+
+
+def finish(stats: Optional[SolverStats], outcome: str, visited: int, path: Optional[List[str]] = None) -> Optional[List[str]]:
+    if stats is not None:
+        stats.finish(outcome, visited, path)
+    return path
+
+
+def rebuild_path(parents: Dict[int, int], state_id: int) -> List[str]:
+    # parents : id d'état -> id du parent * 4 + direction (-1 pour l'état initial)
+    path = []
+    link = parents[state_id]
+    while link >= 0:
+        state_id, move = divmod(link, len(MOVES))
+        path.append(MOVES[move])
+        link = parents[state_id]
+    path.reverse()
+    return path
+
+
+def record_touched(puzzle: Puzzle, parents: Dict[int, int], touched: Optional[Set[Tuple[int, int]]]):
+    # Cases dont la tuile a été lue : toutes celles des états visités
+    if touched is not None:
+        touched.update(puzzle.state_from_id(state_id).pos for state_id in parents)
+
+
+def solve_bfs(puzzle: Puzzle, start: State, max_length: int = 15, max_nodes: Optional[int] = None, touched: Optional[Set[Tuple[int, int]]] = None, stats: Optional[SolverStats] = None) -> Optional[List[str]]:
+    # BFS par couches : chaque état visité ne garde qu'un pointeur vers son parent,
+    # le chemin n'est reconstruit qu'une fois la solution trouvée.
+    # touched reçoit les cases lues : une grille qui ne diffère qu'en dehors de ces
+    # cases donne exactement le même résultat.
+    if stats is not None:
+        puzzle = stats.begin("bfs", puzzle)
+    start_id = puzzle.state_id(start)
+
+    # Visited : id d'état -> id du parent * 4 + direction
+    parents = {start_id: -1}
+    frontier = [start]
+    expanded = 0
+
+    for depth in range(max_length):
+        next_frontier = []
+        for state in frontier:
+            expanded += 1
+            if max_nodes is not None and expanded > max_nodes:
+                record_touched(puzzle, parents, touched)
+                return finish(stats, NODE_LIMIT, len(parents))
+            state_id = puzzle.state_id(state)
+            successors = 0
+
+            # Moves possibles
+            for move, direction in enumerate(MOVES):
+                new_state = puzzle.step(state, direction)
+                if new_state is None:
+                    continue
+                successors += 1
+
+                # Vérif victoire sur la transition : la victoire dépend de la direction
+                # d'arrivée, elle ne doit pas être masquée par un état déjà visité
+                if puzzle.is_victory(new_state, direction):
+                    record_touched(puzzle, parents, touched)
+                    if touched is not None:
+                        touched.add(new_state.pos)
+                    if stats is not None:
+                        stats.expand(state, depth, successors)
+                    path = rebuild_path(parents, state_id) + [direction]  # ✅ BFS : premier trouvé = plus court
+                    return finish(stats, SOLVED, len(parents), path)
+
+                # Si jamais vu → ajouter à la couche suivante
+                new_id = puzzle.state_id(new_state)
+                if new_id not in parents:
+                    parents[new_id] = state_id * len(MOVES) + move
+                    next_frontier.append(new_state)
+                elif stats is not None:
+                    stats.prune(new_state, direction, "visited")
+
+            if stats is not None:
+                stats.expand(state, depth, successors)
+                stats.queue_size(len(frontier) + len(next_frontier))
+
+        if not next_frontier:
+            record_touched(puzzle, parents, touched)
+            return finish(stats, EXHAUSTED, len(parents))
+        frontier = next_frontier
+
+    record_touched(puzzle, parents, touched)
+    return finish(stats, DEPTH_LIMIT, len(parents))  # Pas de solution
+
+
+def goal_distances(puzzle: Puzzle) -> Optional[List[List[int]]]:
+    # Distance de Manhattan de chaque case à la plus proche case pouvant déclencher
+    # la victoire (BFS multi-source sur la grille, sans tenir compte des règles).
+    # None si aucune case ne peut déclencher la victoire.
+    # Aujourd'hui les règles de victoire reçoivent l'emoji de la tuile (comme dans le jeu)
+    # et une condition de tuile (noms de couleurs) n'est jamais vraie : victory_tiles()
+    # renvoie toutes les tuiles ou aucune, et toutes les distances valent 0.
+    victory_tiles = set(puzzle.table.victory_tiles())
+    distances = [[-1] * puzzle.width for _ in range(puzzle.height)]
+    queue = deque()
+    for y, row in enumerate(puzzle.tiles):
+        for x, tile in enumerate(row):
+            if tile in victory_tiles:
+                distances[y][x] = 0
+                queue.append((x, y))
+    if not queue:
+        return None
+
+    while queue:
+        x, y = queue.popleft()
+        for dx, dy in OFFSETS:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < puzzle.width and 0 <= ny < puzzle.height and distances[ny][nx] < 0:
+                distances[ny][nx] = distances[y][x] + 1
+                queue.append((nx, ny))
+    return distances
+
+
+def solve_astar(puzzle: Puzzle, start: State, max_length: int = 15, max_nodes: Optional[int] = None, stats: Optional[SolverStats] = None) -> Optional[List[str]]:
+    # A* avec pour heuristique la distance à la plus proche case victorieuse
+    # (au moins un coup reste toujours à jouer) : admissible et cohérente.
+    # Avec les règles actuelles cette heuristique vaut toujours 1 (voir goal_distances) :
+    # A* explore alors comme une BFS, avec le coût du tas en plus.
+    if stats is not None:
+        puzzle = stats.begin("astar", puzzle)
+    distances = goal_distances(puzzle)
+    if distances is None:
+        return finish(stats, NO_VICTORY_TILE, 0)  # Aucune case ne peut faire gagner : rejet immédiat
+
+    def heuristic(state: State) -> int:
+        x, y = state.pos
+        return max(distances[y][x], 1)
+
+    start_id = puzzle.state_id(start)
+    parents = {start_id: -1}
+    best = {start_id: 0}
+    # (f, -g, ordre d'insertion, g, id d'état, direction finale si victoire sinon -1)
+    heap = [(heuristic(start), 0, 0, 0, start_id, -1)]
+    counter = 1
+    expanded = 0
+    cut = False  # au moins un état écarté par la borne max_length
+
+    while heap:
+        _, _, _, g, state_id, final_move = heapq.heappop(heap)
+
+        # Une transition victorieuse n'est sortie du tas que lorsqu'elle est optimale
+        if final_move >= 0:
+            return finish(stats, SOLVED, len(best), rebuild_path(parents, state_id) + [MOVES[final_move]])
+        if g > best[state_id]:
+            continue  # entrée obsolète
+
+        expanded += 1
+        if max_nodes is not None and expanded > max_nodes:
+            return finish(stats, NODE_LIMIT, len(best))
+
+        state = puzzle.state_from_id(state_id)
+        successors = 0
+        for move, direction in enumerate(MOVES):
+            new_state = puzzle.step(state, direction)
+            if new_state is None:
+                continue
+            successors += 1
+            new_g = g + 1
+            if puzzle.is_victory(new_state, direction):
+                heapq.heappush(heap, (new_g, -new_g, counter, new_g, state_id, move))
+                counter += 1
+                continue
+
+            f = new_g + heuristic(new_state)
+            if f > max_length:
+                cut = True
+                if stats is not None:
+                    stats.prune(new_state, direction, "bound")
+                continue
+            new_id = puzzle.state_id(new_state)
+            if new_g < best.get(new_id, max_length + 1):
+                best[new_id] = new_g
+                parents[new_id] = state_id * len(MOVES) + move
+                heapq.heappush(heap, (f, -new_g, counter, new_g, new_id, -1))
+                counter += 1
+            elif stats is not None:
+                stats.prune(new_state, direction, "visited")
+
+        if stats is not None:
+            stats.expand(state, g, successors)
+            stats.queue_size(len(heap))
+
+    return finish(stats, DEPTH_LIMIT if cut else EXHAUSTED, len(best))  # Pas de solution
+
+
+def solve_backward(puzzle: Puzzle, start: State, max_length: int = 15, max_nodes: Optional[int] = None, stats: Optional[SolverStats] = None) -> Optional[List[str]]:
+    # Accessibilité arrière : BFS depuis les états qui gagnent en un coup, en remontant
+    # les transitions, jusqu'à atteindre l'état initial. La distance obtenue est exacte,
+    # le chemin est ensuite reconstruit en avançant depuis l'état initial.
+    # Pour stats, la profondeur d'un état développé est sa distance à la victoire.
+    if stats is not None:
+        puzzle = stats.begin("backward", puzzle)
+    table = puzzle.table
+    victory_tiles = set(table.victory_tiles())
+    if not any(tile in victory_tiles for row in puzzle.tiles for tile in row):
+        # Aucune case ne peut faire gagner : rejet immédiat (cas déjà écarté par
+        # rule_analysis pour les niveaux générés)
+        return finish(stats, NO_VICTORY_TILE, 0)
+
+    # Couche 1 : états d'où un coup fait gagner, limités aux profils atteignables
+    profiles = table.reachable_profiles(start.profile)
+    distances = {}
+    frontier = []
+    for y in range(puzzle.height):
+        for x in range(puzzle.width):
+            tile = puzzle.tiles[y][x]
+            for profile in profiles:
+                mask = table.allowed_mask(tile, profile) & puzzle.in_bounds[y][x]
+                for move, (dx, dy) in enumerate(OFFSETS):
+                    if not mask & (1 << move):
+                        continue
+                    arrival = puzzle.tiles[y + dy][x + dx]
+                    if arrival in victory_tiles and table.is_victory(arrival, move, table.apply_actions(tile, move, profile)):
+                        state = State((x, y), profile)
+                        distances[puzzle.state_id(state)] = 1
+                        frontier.append(state)
+                        break
+
+    start_id = puzzle.state_id(start)
+    expanded = 0
+    depth = 1
+    while start_id not in distances and frontier and depth < max_length:
+        depth += 1
+        next_frontier = []
+        for state in frontier:
+            expanded += 1
+            if max_nodes is not None and expanded > max_nodes:
+                return finish(stats, NODE_LIMIT, len(distances))
+            x, y = state.pos
+            predecessors = 0
+            # Prédécesseurs : case voisine d'où le déplacement mène ici avec ce profil
+            for move, (dx, dy) in enumerate(OFFSETS):
+                px, py = x - dx, y - dy
+                if not (0 <= px < puzzle.width and 0 <= py < puzzle.height):
+                    continue
+                tile = puzzle.tiles[py][px]
+                for profile in table.inverse_actions(tile, move).get(state.profile, ()):
+                    previous = State((px, py), profile)
+                    previous_id = puzzle.state_id(previous)
+                    if previous_id not in distances and puzzle.allowed_mask(previous) & (1 << move):
+                        distances[previous_id] = depth
+                        next_frontier.append(previous)
+                        predecessors += 1
+            if stats is not None:
+                stats.expand(state, depth - 1, predecessors)
+                stats.queue_size(len(frontier) + len(next_frontier))
+        frontier = next_frontier
+
+    if start_id not in distances:
+        return finish(stats, DEPTH_LIMIT if frontier else EXHAUSTED, len(distances))  # Pas de solution
+
+    # Reconstruction : chaque coup fait baisser la distance d'exactement 1
+    path = []
+    state = start
+    for remaining in range(distances[start_id], 0, -1):
+        for direction in MOVES:
+            new_state = puzzle.step(state, direction)
+            if new_state is None:
+                continue
+            if remaining == 1:
+                if puzzle.is_victory(new_state, direction):
+                    return finish(stats, SOLVED, len(distances), path + [direction])
+            elif distances.get(puzzle.state_id(new_state)) == remaining - 1:
+                path.append(direction)
+                state = new_state
+                break
+    return finish(stats, EXHAUSTED, len(distances))
+
+
+def solve_array(puzzle: Puzzle, start: State, max_length: int = 15, max_nodes: Optional[int] = None, stats: Optional[SolverStats] = None) -> Optional[List[str]]:
+    # BFS vectorisé (numpy, optionnel) : importé seulement à la première utilisation
+    from array_level import solve_array_bfs
+    return solve_array_bfs(puzzle, start, max_length, max_nodes, stats)
+
+
+SOLVERS: Dict[str, Callable] = {
+    "bfs": solve_bfs,
+    "astar": solve_astar,
+    "backward": solve_backward,
+    "array": solve_array,
+}
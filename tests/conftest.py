@@ -0,0 +1,19 @@
+import os
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+# Les modules du jeu sont à la racine du dépôt
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("JEU_SOLVE_CACHE", "0")  # pas de cache disque pendant les tests
+
+from level_generation import generate_random_rules  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def rule_sets():
+    # Jeux de règles aléatoires tirés d'une graine fixe, comme ceux du générateur
+    rng = random.Random(1234)
+    return [generate_random_rules(rng.randint(2, 6), rng) for _ in range(300)]
@@ -0,0 +1,42 @@
+import random
+import pytest
+from rule_engine import RuleTable, Puzzle, State, MOVES, NUM_TILES, NUM_PROFILES, TILE_EMOJIS
+from solvers import solve_bfs
+from utils import compile_rules
+
+np = pytest.importorskip("numpy")
+from array_level import build_tables, solve_array_bfs  # noqa: E402
+
+# Les tables numpy doivent être celles de RuleTable, et la BFS vectorisée suivre le
+# même ordre d'exploration que solve_bfs : mêmes chemins, budgets compris.
+
+
+def fresh_table(emoji_rules) -> RuleTable:
+    # Table hors du cache de RuleTable.from_compiled : build_tables y garde ses tableaux
+    rules, action_rules, victory_rules = compile_rules(emoji_rules, verbose=False)
+    return RuleTable([rule.rule for rule in rules], [rule.rule for rule in action_rules], [rule.rule for rule in victory_rules])
+
+
+def test_tables_match_rule_table(rule_sets):
+    for emoji_rules in rule_sets:
+        allowed, actions, victory = build_tables(fresh_table(emoji_rules))
+        table = fresh_table(emoji_rules).fill()
+        assert (allowed == np.array(table.allowed).reshape(NUM_TILES, NUM_PROFILES)).all(), emoji_rules
+        assert (actions == np.array(table.actions).reshape(NUM_TILES, len(MOVES), NUM_PROFILES)).all(), emoji_rules
+        assert (victory == np.array(table.victory).reshape(NUM_TILES, len(MOVES), NUM_PROFILES)).all(), emoji_rules
+
+
+@pytest.mark.parametrize("holes", [0.0, 0.3])
+def test_array_engine_matches_bfs(rule_sets, holes):
+    rng = random.Random(4321)
+    for emoji_rules in rule_sets:
+        table = compile_rules(emoji_rules, table=True, verbose=False)
+        size = rng.randint(2, 6)
+        grid = [[rng.choice(TILE_EMOJIS) if rng.random() >= holes else "" for _ in range(size)] for _ in range(size)]
+        grid[0][0] = rng.choice(TILE_EMOJIS)
+        puzzle = Puzzle(grid, table)
+        start = State.make((0, 0))
+        for max_length in (1, 3, 15):
+            for max_nodes in (None, 1, 5, 40):
+                expected = solve_bfs(puzzle, start, max_length, max_nodes)
+                assert solve_array_bfs(puzzle, start, max_length, max_nodes) == expected, (emoji_rules, grid, max_length, max_nodes)
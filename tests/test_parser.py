@@ -0,0 +1,59 @@
+import random
+from constants import COLORS, DIRECTIONS, ITEMS, THEN, NEGATION, VICTORY, PLAYER
+from utils import add_to_result, parse_recursive, tokenize
+
+# parse_recursive parcourt les jetons en une passe ; son résultat doit rester celui de
+# la version récursive d'origine, recopiée ici comme référence.
+
+
+def reference_parse(tokens, context="if", result=None):
+    if result is None:
+        result = {"win": False, "negation": False, "if": {}, "then": {}}
+
+    if len(tokens) == 0:
+        return result
+    elif tokens[0] == THEN:
+        return reference_parse(tokens[1:], context="then", result=result)
+    elif tokens[0] == NEGATION:
+        result["negation"] = True
+        return reference_parse(tokens[1:], context=context, result=result)
+    elif tokens[0] == VICTORY:
+        result["win"] = True
+        return reference_parse(tokens[1:], context=context, result=result)
+    elif tokens[0] == PLAYER:
+        if len(tokens) == 1:
+            return result
+        if tokens[1] in COLORS:
+            add_to_result(tokens, result, "player_condition", "colors", COLORS, context)
+            return reference_parse([tokens[0]] + tokens[2:], context=context, result=result)
+        elif tokens[1] in DIRECTIONS:
+            add_to_result(tokens, result, "player_condition", "directions", DIRECTIONS, context)
+            return reference_parse([tokens[0]] + tokens[2:], context=context, result=result)
+        elif tokens[1] in ITEMS:
+            add_to_result(tokens, result, "player_condition", "items", ITEMS, context)
+            return reference_parse([tokens[0]] + tokens[2:], context=context, result=result)
+        elif tokens[1] == THEN:
+            return reference_parse(tokens[2:], context="then", result=result)
+    elif tokens[0] in COLORS:
+        add_to_result(tokens, result, "tile_condition", "colors", COLORS, context)
+        return reference_parse(tokens[1:], context=context, result=result)
+    elif tokens[0] in DIRECTIONS:
+        add_to_result(tokens, result, "direction_condition", "directions", DIRECTIONS, context)
+        return reference_parse(tokens[1:], context=context, result=result)
+
+    return result
+
+
+def test_generated_rules(rule_sets):
+    for emoji_rules in rule_sets:
+        for rule in emoji_rules:
+            tokens = tokenize(rule)
+            assert parse_recursive(tokens) == reference_parse(tokens), rule
+
+
+def test_random_token_strings():
+    alphabet = [THEN, NEGATION, VICTORY, PLAYER, "?"] + list(COLORS) + list(DIRECTIONS) + list(ITEMS)
+    rng = random.Random(1234)
+    for _ in range(5000):
+        tokens = [rng.choice(alphabet) for _ in range(rng.randint(0, 12))]
+        assert parse_recursive(tokens) == reference_parse(tokens), tokens
@@ -0,0 +1,39 @@
+from game import Level
+from rule_engine import (RuleTable, MOVES, COLOR_NAMES, TILE_EMOJIS, NO_TILE, NUM_PROFILES,
+                         make_profile, profile_color, profile_inventory, inventory_items)
+from utils import compile_rules
+
+# Les tables de RuleTable doivent donner exactement le résultat des closures de
+# utils.compile_rule, qu'elles remplacent dans les solveurs.
+
+
+def player_level(profile: int) -> Level:
+    level = Level([["⬜"]], (0, 0))
+    level.player_color = profile_color(profile)
+    level.player_inventory = inventory_items(profile_inventory(profile))
+    return level
+
+
+def test_table_matches_closures(rule_sets):
+    for emoji_rules in rule_sets[:100]:
+        rules, action_rules, victory_rules = compile_rules(emoji_rules, verbose=False)
+        table = RuleTable.from_compiled(rules, action_rules, victory_rules)
+        for tile in range(NO_TILE):
+            for profile in range(NUM_PROFILES):
+                for move, direction in enumerate(MOVES):
+                    case = (emoji_rules, TILE_EMOJIS[tile], profile, direction)
+
+                    # Règles de déplacement : nom de la couleur de la case
+                    level = player_level(profile)
+                    allowed = all(rule(level, direction, COLOR_NAMES[tile], rules) for rule in rules)
+                    assert allowed == bool(table.allowed_mask(tile, profile) >> move & 1), case
+
+                    # Règles d'action et de victoire : emoji de la case
+                    level = player_level(profile)
+                    for rule in action_rules:
+                        rule(level, direction, TILE_EMOJIS[tile], rules)
+                    assert make_profile(level.player_color, level.player_inventory) == table.apply_actions(tile, move, profile), case
+
+                    level = player_level(profile)
+                    won = all(rule(level, direction, TILE_EMOJIS[tile], rules) for rule in victory_rules)
+                    assert won == table.is_victory(tile, move, profile), case
@@ -0,0 +1,48 @@
+import random
+import pytest
+from rule_engine import Puzzle, State, TILE_EMOJIS
+from solvers import SOLVERS, SolverStats, SOLVED
+from utils import compile_rules
+
+# Tous les moteurs renvoient une solution la plus courte : mêmes longueurs que la BFS,
+# et chaque solution se rejoue jusqu'à la victoire sur son dernier coup.
+# Le moteur "array" (numpy) est vérifié dans test_array_level.py.
+ENGINES = ["astar", "backward"]
+
+
+def random_puzzles(rule_sets, holes: float):
+    rng = random.Random(4321)
+    for emoji_rules in rule_sets:
+        table = compile_rules(emoji_rules, table=True, verbose=False)
+        grid = [[rng.choice(TILE_EMOJIS) if rng.random() >= holes else "" for _ in range(4)] for _ in range(4)]
+        grid[0][0] = rng.choice(TILE_EMOJIS)
+        yield emoji_rules, Puzzle(grid, table)
+
+
+def replay(puzzle: Puzzle, start: State, solution):
+    state = start
+    for index, direction in enumerate(solution):
+        state = puzzle.step(state, direction)
+        assert state is not None
+        assert puzzle.is_victory(state, direction) == (index == len(solution) - 1)
+
+
+@pytest.mark.parametrize("holes", [0.0, 0.3])  # 0.3 : cases vides "" dans la grille
+@pytest.mark.parametrize("engine", ENGINES)
+def test_engine_matches_bfs(rule_sets, engine, holes):
+    for emoji_rules, puzzle in random_puzzles(rule_sets, holes):
+        start = State.make((0, 0))
+        expected = SOLVERS["bfs"](puzzle, start, 12)
+        solution = SOLVERS[engine](puzzle, start, 12)
+        assert (solution is None) == (expected is None), (emoji_rules, puzzle.grid)
+        if solution is not None:
+            assert len(solution) == len(expected), (emoji_rules, puzzle.grid)
+            replay(puzzle, start, solution)
+
+
+def test_stats_outcome(rule_sets):
+    for engine in ["bfs"] + ENGINES:
+        for _, puzzle in random_puzzles(rule_sets[:50], 0.0):
+            stats = SolverStats()
+            solution = SOLVERS[engine](puzzle, State.make((0, 0)), 12, stats=stats)
+            assert (stats.outcome == SOLVED) == (solution is not None)
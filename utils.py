@@ -1,8 +1,8 @@
 from typing import List, Dict, Callable, Tuple
-import regex
-from collections import deque
+from functools import lru_cache
 import json
 from constants import COLORS, DIRECTIONS, ITEMS, THEN, NEGATION, VICTORY, PLAYER, PATH
+from rule_engine import RuleTable, Puzzle, State, MOVES
 import time 
 
 def add_to_result(tokens: List[str], result: Dict[str, List[Dict]], type: str, name: str, container: Dict, context: str):
@@ -25,46 +25,66 @@ def add_to_result(tokens: List[str], result: Dict[str, List[Dict]], type: str, n
     
 
 # Tokenizer using extended grapheme clusters
+GRAPHEMES = None
+
 def tokenize(rule: str) -> List[str]:
-    return regex.findall(r"\X", rule)
+    global GRAPHEMES
+    if GRAPHEMES is None:
+        import regex  # import différé : inutile tant qu'aucune règle n'est analysée
+        GRAPHEMES = regex.compile(r"\X")
+    return GRAPHEMES.findall(rule)
 
+# Analyse en une seule passe (le nom est conservé pour les appelants existants)
 def parse_recursive(tokens: List[str], context: str = "if", result: Dict[str, List[Dict]] = None) -> Dict:
     if result is None:
         result = {"win": False, "negation": False, "if": {}, "then": {}}
-    
-    if len(tokens) == 0:
-        return result
-    elif tokens[0] == THEN:
-        return parse_recursive(tokens[1:], context="then", result=result)
-    elif tokens[0] == NEGATION:
-        result["negation"] = True
-        return parse_recursive(tokens[1:], context=context, result=result)
-    elif tokens[0] == VICTORY:
-        result["win"] = True
-        return parse_recursive(tokens[1:], context=context, result=result)
-    elif tokens[0] == PLAYER:
-        if len(tokens) == 1:
+
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token == THEN:
+            context = "then"
+        elif token == NEGATION:
+            result["negation"] = True
+        elif token == VICTORY:
+            result["win"] = True
+        elif token == PLAYER:
+            # Le 🤖 porte sur tous les attributs qui le suivent
+            i += 1
+            while i < len(tokens):
+                if tokens[i] in COLORS:
+                    add_to_result([PLAYER, tokens[i]], result, "player_condition", "colors", COLORS, context)
+                elif tokens[i] in DIRECTIONS:
+                    add_to_result([PLAYER, tokens[i]], result, "player_condition", "directions", DIRECTIONS, context)
+                elif tokens[i] in ITEMS:
+                    add_to_result([PLAYER, tokens[i]], result, "player_condition", "items", ITEMS, context)
+                else:
+                    break
+                i += 1
+            if i < len(tokens) and tokens[i] == THEN:
+                context = "then"
+            else:
+                return result
+        elif token in COLORS:
+            add_to_result([token], result, "tile_condition", "colors", COLORS, context)
+        elif token in DIRECTIONS:
+            add_to_result([token], result, "direction_condition", "directions", DIRECTIONS, context)
+        else:
             return result
-        if tokens[1] in COLORS:
-            add_to_result(tokens, result, "player_condition", "colors", COLORS, context)
-            return parse_recursive([tokens[0]] + tokens[2:], context=context, result=result)
-        elif tokens[1] in DIRECTIONS:
-            add_to_result(tokens, result, "player_condition", "directions", DIRECTIONS, context)
-            return parse_recursive([tokens[0]] + tokens[2:], context=context, result=result)
-        elif tokens[1] in ITEMS:
-            add_to_result(tokens, result, "player_condition", "items", ITEMS, context)
-            return parse_recursive([tokens[0]] + tokens[2:], context=context, result=result)
-        elif tokens[1] == THEN:
-            return parse_recursive(tokens[2:], context="then", result=result)
-    elif tokens[0] in COLORS:
-        add_to_result(tokens, result, "tile_condition", "colors", COLORS, context)
-        return parse_recursive(tokens[1:], context=context, result=result)
-    elif tokens[0] in DIRECTIONS:
-        add_to_result(tokens, result, "direction_condition", "directions", DIRECTIONS, context)
-        return parse_recursive(tokens[1:], context=context, result=result)
+        i += 1
 
     return result
 
+# Les règles analysées et compilées sont partagées entre tous les appels : elles ne
+# doivent pas être modifiées.
+@lru_cache(maxsize=4096)
+def parse_rule(rule: str) -> Dict:
+    return parse_recursive(tokenize(rule))
+
+@lru_cache(maxsize=4096)
+def compile_emoji_rule(rule: str) -> Callable[[str, str], bool]:
+    return compile_rule(parse_rule(rule))
+
 def compile_rule(rule: Dict) -> Callable[[str, str], bool]:
     def compiled_rule(level, direction: str, tile: str, rules: List[Callable[[str, str], bool]]) -> bool:
         test_if = True
@@ -99,6 +119,7 @@ def compile_rule(rule: Dict) -> Callable[[str, str], bool]:
                 level.player_color = rule["then"].get("colors", [level.player_color])[0]
             return True
 
+    compiled_rule.rule = rule
     return compiled_rule
 
 def get_allowed_moves(position: Tuple[int, int], rules: List[Callable[[str, str], bool]], level) -> List[str]:
@@ -131,101 +152,45 @@ def move_player_if_allowed(level, direction: str, rules: List[Callable[[str, str
     return False
 
 def print_level(level):
-    output = ""
-    for y, row in enumerate(level.grid):
-        for x, tile in enumerate(row):
-            if (x, y) == level.player_pos:
-                output += "🤖"  # joueur
-            else:
-                output += tile
-        output += "\n"
-    print(output)
-
-def solve_level(level, rules, action_rules, victory_rules, start_pos, max_length=15):
-    
-    # État initial
-    start_state = (
-        start_pos,
-        level.player_color,
-        tuple(sorted(level.player_inventory))
-    )
-    
-    # File BFS (position, état du level, chemin)
-    queue = deque()
-    queue.append((start_pos, level.player_color, tuple(level.player_inventory), []))
-    
-    # Visited pour éviter les boucles
-    visited = set([start_state])
-    
-    while queue:
-        pos, player_color, inventory, path = queue.popleft()
-
-        if len(path) > max_length:
-            return None
-        
-        # Mettre à jour le level temporaire
-        level.player_pos = pos
-        level.player_color = player_color
-        level.player_inventory = list(inventory)
-        
-        # Vérif victoire
-        if path and all(victory(level, path[-1], level.get_tile(pos), rules) for victory in victory_rules):
-            return path  # ✅ BFS : premier trouvé = plus court
-        
-        # Moves possibles
-        for direction in get_allowed_moves(pos, rules, level):
-            dx, dy = {
-                "UP": (0, -1),
-                "DOWN": (0, 1),
-                "LEFT": (-1, 0),
-                "RIGHT": (1, 0)
-            }[direction]
-            new_pos = (pos[0] + dx, pos[1] + dy)
-            
-            # Sauvegarder avant d'appliquer effets
-            tmp_color = level.player_color
-            tmp_inv = list(level.player_inventory)
-            
-            # Appliquer règles d’action
-            for action_rule in action_rules:
-                action_rule(level, direction, level.get_tile(pos), rules)
-            
-            # Nouvel état
-            new_state = (
-                new_pos,
-                level.player_color,
-                tuple(sorted(level.player_inventory))
-            )
-            
-            # Si jamais vu → ajouter à la queue
-            if new_state not in visited:
-                visited.add(new_state)
-                queue.append((
-                    new_pos,
-                    level.player_color,
-                    tuple(level.player_inventory),
-                    path + [direction]
-                ))
-            
-            # Restaurer état (pas besoin car BFS garde tout en queue)
-            level.player_color = tmp_color
-            level.player_inventory = tmp_inv
-    
-    return None  # Pas de solution
+    # Image complète en une seule écriture (voir renderer.TerminalRenderer pour l'affichage incrémental)
+    rows = ["".join("🤖" if (x, y) == level.player_pos else tile for x, tile in enumerate(row)) for y, row in enumerate(level.grid)]  # 🤖 : joueur
+    print("\n".join(rows) + "\n")
+
+def solve_level(level, rules, action_rules, victory_rules, start_pos, max_length=15, max_nodes=None, engine="bfs", stats=None, cache=True):
+    # engine : "bfs", "astar" ou "backward" (voir solvers.SOLVERS), tous renvoient une solution
+    # la plus courte. max_length borne la longueur de la solution, max_nodes le nombre
+    # d'états développés. stats (solvers.SolverStats) reçoit les statistiques de la résolution.
+    # cache : True pour le cache disque par défaut, False pour le désactiver, ou un SolveCache.
+    # Le cache est ignoré quand stats est fourni (les callbacks doivent être appelés).
+    from solvers import SOLVERS
+    from solve_cache import get_default_cache, solve_key
+    if engine not in SOLVERS:
+        raise ValueError(f"Moteur de résolution inconnu : {engine}")
+    puzzle = Puzzle.from_level(level, rules, action_rules, victory_rules)
+    start_state = State.make(start_pos, level.player_color, level.player_inventory)
+
+    if cache is True:
+        cache = get_default_cache()
+    if not cache or stats is not None:
+        return SOLVERS[engine](puzzle, start_state, max_length, max_nodes, stats=stats)
+
+    key = solve_key(puzzle.grid, start_state, puzzle.table, engine, max_length, max_nodes)
+    found, solution = cache.get(key)
+    if found:
+        return solution
+    solution = SOLVERS[engine](puzzle, start_state, max_length, max_nodes)
+    if solution is not None or max_nodes is None:  # un échec dû à max_nodes n'est pas définitif
+        cache.put(key, solution)
+    return solution
 
 def solve_level_dfs(level, rules, action_rules, victory_rules, position, path, visited):
-    if len(path) > 50:
-        return None
-    # Créer un état unique (position + couleur + inventaire)
-    state = (
-        position,
-        level.player_color,
-        tuple(sorted(level.player_inventory))
-    )
+    puzzle = Puzzle.from_level(level, rules, action_rules, victory_rules)
+    state = State.make(position, level.player_color, level.player_inventory)
+    return _solve_dfs(puzzle, state, path, visited)
 
-    # Victoire ?
-    if path and all(victory(level, path[-1], level.get_tile(level.player_pos), rules) for victory in victory_rules):
-        return path
+def _solve_dfs(puzzle, state, path, visited):
+    if len(path) >= 50:
+        return None
 
     # Boucle infinie : on a déjà vu EXACTEMENT cet état
     if state in visited:
@@ -233,35 +198,21 @@ def solve_level_dfs(level, rules, action_rules, victory_rules, position, path, v
     visited.add(state)
 
     # Essayer tous les moves possibles
-    for direction in get_allowed_moves(position, rules, level):
-        dx, dy = {
-                "UP": (0, -1),
-                "DOWN": (0, 1),
-                "LEFT": (-1, 0),
-                "RIGHT": (1, 0)
-            }[direction]
-        new_pos = (position[0] + dx, position[1] + dy)
-
-        # Sauvegarder l'état avant d'appliquer les action_rules
-        saved_color = level.player_color
-        saved_inventory = list(level.player_inventory)
-        saved_pos = level.player_pos
+    for direction in MOVES:
+        new_state = puzzle.step(state, direction)
+        if new_state is None:
+            continue
 
-        # Appliquer les effets de l'action
-        for action_rule in action_rules:
-            action_rule(level, direction, level.get_tile(level.player_pos), rules)
+        # Victoire ?
+        if puzzle.is_victory(new_state, direction):
+            return path + [direction]
 
         # Explorer en profondeur
-        result = solve_level(level, rules, action_rules, victory_rules, new_pos, path + [direction], visited)
+        result = _solve_dfs(puzzle, new_state, path + [direction], visited)
 
         if result:  # solution trouvée
             return result
 
-        # Restaurer l'état (backtrack)
-        level.player_color = saved_color
-        level.player_inventory = saved_inventory
-        level.player_pos = saved_pos
-
     return None
 
 
@@ -276,17 +227,19 @@ def save_level(level, rules: List[str], solution: List[str], filename: str):
     with open(PATH / "Levels" / filename, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
 
-def compile_rules(emoji_rules: List[str]):
-    parsed_rules = []
-    for rule in emoji_rules:
-        tokens = tokenize(rule)
-        parsed = parse_recursive(tokens)
-        parsed_rules.append(parsed)
+def compile_rules(emoji_rules: List[str], table: bool = False, verbose: bool = True):
+    compiled_rules = [compile_emoji_rule(rule) for rule in emoji_rules]
+    parsed_rules = [compiled.rule for compiled in compiled_rules]
     
-    print(parsed_rules)
+    if verbose:
+        print(parsed_rules)
+
+    rules = [compiled for compiled in compiled_rules if not compiled.rule["win"] and compiled.rule["then"]["type"] != "player_condition"]
+    action_rules = [compiled for compiled in compiled_rules if not compiled.rule["win"] and compiled.rule["then"]["type"] == "player_condition"]
+    victory_rules = [compiled for compiled in compiled_rules if compiled.rule["win"]]
 
-    rules = [compile_rule(rule) for rule in parsed_rules if not rule["win"] and rule["then"]["type"] != "player_condition"]
-    action_rules = [compile_rule(rule) for rule in parsed_rules if not rule["win"] and rule["then"]["type"] == "player_condition"]
-    victory_rules = [compile_rule(rule) for rule in parsed_rules if rule["win"]]
+    # Mode compilé : une seule table de correspondance remplace les closures
+    if table:
+        return RuleTable.from_compiled(rules, action_rules, victory_rules)
 
     return rules, action_rules, victory_rules
@@ -0,0 +1,140 @@
+from typing import List, Dict, Iterator, Optional, Tuple, Union
+import argparse
+import itertools
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from rule_engine import Puzzle, State, MOVES
+from solvers import solve_bfs
+from utils import compile_rules
+from level_pack import LevelPack, MAGIC
+
+# Vérification des solutions enregistrées : on rejoue les coups au lieu de relancer
+# le solveur, en O(longueur de la solution) par niveau.
+#   OK      : la solution est jouable et gagne sur son dernier coup
+#   STALE   : la solution gagne mais n'est plus à jour (victoire avant la fin,
+#             ou solution plus longue que l'optimum avec optimal=True)
+#   INVALID : coup interdit, direction inconnue, pas de victoire à la fin, ou
+#             niveau illisible (un niveau illisible n'interrompt pas le lot)
+OK = "ok"
+STALE = "stale"
+INVALID = "invalid"
+
+
+def replay_solution(puzzle: Puzzle, start: State, solution: List[str]) -> Tuple[str, str]:
+    state = start
+    for index, direction in enumerate(solution):
+        if direction not in MOVES:
+            return INVALID, f"direction inconnue au coup {index + 1} : {direction}"
+        new_state = puzzle.step(state, direction)
+        if new_state is None:
+            return INVALID, f"coup {index + 1} interdit : {direction} depuis {state.pos}"
+        state = new_state
+        if puzzle.is_victory(state, direction):
+            if index + 1 < len(solution):
+                return STALE, f"victoire dès le coup {index + 1} sur {len(solution)}"
+            return OK, ""
+    return INVALID, "pas de victoire à la fin de la solution"
+
+def verify_level(data: Union[Dict, ValueError], optimal: bool = False) -> Tuple[str, str]:
+    # data : niveau au format JSON de Levels/ (grid, start, emoji_rules, solution),
+    # ou l'erreur rencontrée en le lisant (voir iter_entries)
+    if isinstance(data, Exception):
+        return INVALID, f"niveau illisible : {data}"
+    try:
+        table = compile_rules(data["emoji_rules"], table=True, verbose=False)
+        puzzle = Puzzle(data["grid"], table)
+        start = State.make(data["start"])
+        puzzle.check(start)
+    except Exception as e:
+        return INVALID, f"niveau illisible : {e}"
+
+    solution = data.get("solution")
+    if not solution:
+        return INVALID, "aucune solution enregistrée"
+    try:
+        status, reason = replay_solution(puzzle, start, solution)
+
+        # Optionnel : comparer à une solution la plus courte (une BFS par niveau)
+        if status == OK and optimal:
+            shortest = solve_bfs(puzzle, start, max_length=len(solution) - 1)
+            if shortest is not None:
+                return STALE, f"solution en {len(solution)} coups, optimum en {len(shortest)}"
+    except Exception as e:
+        return INVALID, f"niveau illisible : {e}"
+    return status, reason
+
+
+def parse_entry(text: bytes) -> Union[Dict, ValueError]:
+    # Niveau JSON, ou l'erreur de lecture (ValueError, transmissible aux processus)
+    try:
+        data = json.loads(text)
+    except ValueError as e:
+        return ValueError(str(e))
+    if not isinstance(data, dict):
+        return ValueError("objet JSON attendu")
+    return data
+
+def iter_entries(path) -> Iterator[Tuple[str, Union[Dict, ValueError]]]:
+    # (nom, niveau) pour un dossier de fichiers JSON, un corpus JSONL ou un paquet binaire.
+    # Une entrée illisible donne (nom, erreur) au lieu d'interrompre le lot.
+    path = Path(path)
+    if path.is_dir():
+        for file in sorted(path.glob("*.json")):
+            try:
+                yield file.name, parse_entry(file.read_bytes())
+            except OSError as e:
+                yield file.name, ValueError(str(e))
+        return
+
+    with open(path, "rb") as f:
+        is_pack = f.read(len(MAGIC)) == MAGIC
+    if is_pack:
+        with LevelPack(path) as pack:
+            for index in range(len(pack)):
+                try:
+                    data = pack[index]
+                except Exception as e:
+                    data = ValueError(str(e))
+                yield f"{path.name}[{index}]", data
+    elif path.suffix == ".jsonl":
+        with open(path, "rb") as f:
+            for line, text in enumerate(f):
+                if text.strip():
+                    yield f"{path.name}:{line + 1}", parse_entry(text)
+    else:
+        yield path.name, parse_entry(path.read_bytes())
+
+def _verify_entry(entry: Tuple[str, Union[Dict, ValueError]], optimal: bool) -> Tuple[str, str, str]:
+    name, data = entry
+    return (name,) + verify_level(data, optimal)
+
+def verify_batch(path, workers: Optional[int] = None, optimal: bool = False, chunksize: int = 64) -> List[Tuple[str, str, str]]:
+    # (nom, statut, raison) pour chaque niveau, dans l'ordre de la source
+    entries = iter_entries(path)
+    if workers == 1:
+        return [_verify_entry(entry, optimal) for entry in entries]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_verify_entry, entries, itertools.repeat(optimal), chunksize=chunksize))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vérification des solutions enregistrées")
+    parser.add_argument("paths", nargs="+", help="dossiers de niveaux JSON, corpus JSONL ou paquets")
+    parser.add_argument("--workers", type=int, help="processus de vérification (1 = sans parallélisme)")
+    parser.add_argument("--optimal", action="store_true", help="signaler aussi les solutions non optimales")
+    parser.add_argument("--all", action="store_true", help="afficher aussi les niveaux valides")
+    args = parser.parse_args()
+
+    counts = {OK: 0, STALE: 0, INVALID: 0}
+    for path in args.paths:
+        for name, status, reason in verify_batch(path, args.workers, args.optimal):
+            counts[status] += 1
+            if status != OK or args.all:
+                print(f"{status.upper():8} {name} {reason}")
+    print(f"{counts[OK]} valides, {counts[STALE]} à mettre à jour, {counts[INVALID]} invalides")
+    return 1 if counts[STALE] or counts[INVALID] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())